@@ -0,0 +1,157 @@
+import random
+import numpy as np
+from src.game.maze import Maze
+from src.utils.constants import *
+
+# Per-game status codes
+RUNNING = 0
+CAUGHT = 1
+ESCAPED = 2
+
+class BatchSimulation:
+    """Many games held as NumPy arrays and advanced together.
+
+    Each step is one cell move for every player, with the same rules as
+    Simulation: coins and power-ups, enemy collision and reaching the exit.
+    The enemy walks down a distance-to-player field that is relaxed a few
+    sweeps per step, so no game needs its own search. Finished games stay
+    frozen until reset() is called for them.
+    """
+    def __init__(self, num_games, level=1, size=GRID_SIZE, dt=0.25,
+                 countdown=COUNTDOWN_DURATION, sweeps_per_step=2, seed=None):
+        self.num_games = num_games
+        # Seeds every maze the batch builds, so a batch seed reproduces a run
+        self.rng = random.Random(seed)
+        self.size = size
+        self.dt = dt
+        self.initial_countdown = countdown
+        self.sweeps_per_step = sweeps_per_step
+        # Larger than any real distance; used for walls and unreached cells
+        self.unreachable = size * size + 1
+
+        shape = (num_games, size, size)
+        self.grids = np.zeros(shape, dtype=np.uint8)
+        # Walls and distances carry a one-cell border so shifts need no bounds checks
+        self.walkable = np.zeros((num_games, size + 2, size + 2), dtype=bool)
+        self.distances = np.full((num_games, size + 2, size + 2), self.unreachable, dtype=np.int32)
+
+        self.level = np.full(num_games, level, dtype=np.int32)
+        self.player = np.ones((num_games, 2), dtype=np.int32)
+        self.enemy = np.ones((num_games, 2), dtype=np.int32)
+        self.enemy_progress = np.zeros(num_games)
+        self.score = np.zeros(num_games, dtype=np.int64)
+        self.countdown = np.zeros(num_games)
+        self.immunity = np.zeros(num_games)
+        self.power_up_timer = np.zeros(num_games)
+        self.status = np.zeros(num_games, dtype=np.int8)
+        self.ticks = 0
+
+        self.reset()
+
+    def reset(self, indices=None):
+        # Building mazes is per game, but only happens between episodes
+        if indices is None:
+            indices = range(self.num_games)
+        for i in indices:
+            maze = Maze(int(self.level[i]), self.size, seed=self.rng.getrandbits(32))
+            self.grids[i] = maze.grid
+            self.walkable[i, 1:-1, 1:-1] = maze.grid != Cell.WALL
+
+            distances = np.array(maze.get_player_distances((1, 1)), dtype=np.int32)
+            distances = distances.reshape(self.size + 2, self.size + 2)
+            self.distances[i] = np.where(distances < 0, self.unreachable, distances)
+
+        indices = np.asarray(list(indices), dtype=np.intp)
+        self.player[indices] = 1
+        self.enemy[indices] = 1
+        self.enemy_progress[indices] = 0
+        self.score[indices] = 0
+        self.countdown[indices] = self.initial_countdown
+        self.immunity[indices] = IMMUNITY_DURATION
+        self.power_up_timer[indices] = 0
+        self.status[indices] = RUNNING
+
+    def enemy_speed_ratio(self):
+        # Same per-level speed as Enemy.update_speed, relative to the player
+        speed = np.maximum(PLAYER_SPEED / 2, INITIAL_ENEMY_SPEED + self.level * SPEED_INCREASE_PER_LEVEL)
+        return np.minimum(speed, MAX_ENEMY_SPEED) / PLAYER_SPEED
+
+    def relax_distances(self):
+        # One synchronous BFS sweep toward every player. Values may also grow,
+        # so the field follows players that walk away.
+        games = np.arange(self.num_games)
+        d = self.distances
+        for _ in range(self.sweeps_per_step):
+            nearest = np.minimum(np.minimum(d[:, :-2, 1:-1], d[:, 2:, 1:-1]),
+                                 np.minimum(d[:, 1:-1, :-2], d[:, 1:-1, 2:]))
+            inner = np.minimum(nearest + 1, self.unreachable)
+            d[:, 1:-1, 1:-1] = np.where(self.walkable[:, 1:-1, 1:-1], inner, self.unreachable)
+            d[games, self.player[:, 1] + 1, self.player[:, 0] + 1] = 0
+
+    def step(self, actions):
+        """Advance every running game by one move; actions is one ACTION_* mask per game"""
+        actions = np.asarray(actions)
+        games = np.arange(self.num_games)
+        running = self.status == RUNNING
+
+        # Countdown before the level starts
+        counting = running & (self.countdown > 0)
+        self.countdown[counting] -= self.dt
+        active = running & ~counting
+
+        self.immunity[active] -= self.dt
+        self.power_up_timer[active] -= self.dt
+
+        # Player movement, only when exactly one axis is pressed
+        dx = ((actions & ACTION_RIGHT) > 0).astype(np.int32) - ((actions & ACTION_LEFT) > 0)
+        dy = ((actions & ACTION_DOWN) > 0).astype(np.int32) - ((actions & ACTION_UP) > 0)
+        target_x = self.player[:, 0] + dx
+        target_y = self.player[:, 1] + dy
+        moves = active & ((dx != 0) ^ (dy != 0)) & self.walkable[games, target_y + 1, target_x + 1]
+        self.player[moves, 0] = target_x[moves]
+        self.player[moves, 1] = target_y[moves]
+
+        # Enemy steps down the distance field at its speed relative to the player
+        self.relax_distances()
+        self.enemy_progress[active] += self.enemy_speed_ratio()[active]
+        stepping = active & (self.enemy_progress >= 1)
+        self.enemy_progress[stepping] -= 1
+
+        ex = self.enemy[:, 0] + 1
+        ey = self.enemy[:, 1] + 1
+        d = self.distances
+        # Neighbour order matches DIRECTIONS: down, right, up, left
+        options = np.stack([d[games, ey + 1, ex], d[games, ey, ex + 1],
+                            d[games, ey - 1, ex], d[games, ey, ex - 1]])
+        best = np.argmin(options, axis=0)
+        # Only move when that neighbour is actually closer to the player
+        stepping &= options[best, games] < d[games, ey, ex]
+        step_x = np.array([0, 1, 0, -1])[best]
+        step_y = np.array([1, 0, -1, 0])[best]
+        self.enemy[stepping, 0] += step_x[stepping]
+        self.enemy[stepping, 1] += step_y[stepping]
+
+        # Enemy collision
+        caught = (active & np.all(self.player == self.enemy, axis=1) &
+                  (self.immunity <= 0) & (self.power_up_timer <= 0))
+        self.status[caught] = CAUGHT
+
+        # Item collection
+        px = self.player[:, 0]
+        py = self.player[:, 1]
+        cells = self.grids[games, py, px]
+        coins = active & (cells == Cell.COIN)
+        power_ups = active & (cells == Cell.POWER_UP)
+        self.score[coins] += 10
+        self.power_up_timer[power_ups] = POWER_UP_DURATION
+        collected = coins | power_ups
+        self.grids[games[collected], py[collected], px[collected]] = Cell.PATH
+
+        # Level completion
+        escaped = active & (cells == Cell.EXIT)
+        self.score[escaped] += 50
+        self.level[escaped] += 1
+        self.status[escaped] = ESCAPED
+
+        self.ticks += 1
+        return self.status
@@ -0,0 +1,41 @@
+import math
+from src.utils.constants import *
+
+class Camera:
+    """Scrolling view of view_size x view_size cells that follows a target.
+
+    Positions are in cells. offset() is the pixel shift that maps world
+    coordinates to the screen, so drawing code keeps computing
+    offset + x * cell_size exactly as it did with a fixed padding.
+    """
+    def __init__(self, view_size=VIEWPORT_SIZE, cell_size=CELL_SIZE, padding=PADDING):
+        self.view_size = view_size
+        self.cell_size = cell_size
+        self.padding = padding
+        # World position of the top-left corner of the view
+        self.x = 0.0
+        self.y = 0.0
+
+    def follow(self, target_x, target_y, world_size=None):
+        # Keep the target's cell centred, without showing past the maze edges
+        half = (self.view_size - 1) / 2
+        self.x = target_x - half
+        self.y = target_y - half
+        if world_size is not None:
+            limit = max(0, world_size - self.view_size)
+            self.x = min(max(self.x, 0), limit)
+            self.y = min(max(self.y, 0), limit)
+
+    def offset(self):
+        return (self.padding - int(round(self.x * self.cell_size)),
+                self.padding - int(round(self.y * self.cell_size)))
+
+    def viewport(self):
+        # Screen rectangle the maze is drawn into, as (left, top, width, height)
+        extent = self.view_size * self.cell_size
+        return (self.padding, self.padding, extent, extent)
+
+    def visible_cells(self):
+        # Cells at least partly on screen, as (left, top, right, bottom), exclusive
+        return (math.floor(self.x), math.floor(self.y),
+                math.ceil(self.x + self.view_size), math.ceil(self.y + self.view_size))
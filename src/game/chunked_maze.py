@@ -0,0 +1,205 @@
+import os
+import random
+from collections import OrderedDict
+import numpy as np
+from src.game.maze import Maze
+from src.game.pathfinding import PathFinder
+from src.utils.constants import *
+
+class ChunkedMaze:
+    """Endless maze made of square chunks generated on demand.
+
+    Chunk (cx, cy) covers world cells [cx * chunk_size, (cx + 1) * chunk_size)
+    on each axis and is an ordinary Maze seeded from the world seed and its
+    coordinates. Doors across each border are drawn from a stream keyed by
+    that border, so both neighbours open the same cells without seeing each
+    other. At most cache_size chunks stay in memory; evicted chunks are
+    written to directory when the player changed them, or otherwise rebuilt
+    from their seed with the items already collected there taken out again.
+
+    Searches run over a dense window of the chunks around the player,
+    which follow() moves whenever the player enters a new chunk.
+    """
+    def __init__(self, seed=None, level=1, chunk_size=CHUNK_SIZE,
+                 cache_size=CHUNK_CACHE_SIZE, directory=None):
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.level = level
+        self.chunk_size = chunk_size
+        self.cache_size = cache_size
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.chunks = OrderedDict()  # (cx, cy) -> Maze, least recently used first
+        self.modified = set()  # loaded chunks whose items changed
+        self.collected = {}  # (cx, cy) -> chunk cells emptied, for rebuilding
+        self.size = None  # unbounded
+        # The world has no exit; the player starts in chunk (0, 0)
+        self.exit_pos = None
+        self.start_pos = (1, 1)
+        self.dirty_cells = []
+        # Chunk the search window is centred on, and the window's cells
+        self.center = None
+        self.window = None
+        self.pathfinder = None
+        self.player_distances = None
+        self.player_cell = None
+
+    def chunk_key(self, x, y):
+        return (x // self.chunk_size, y // self.chunk_size)
+
+    def chunk_path(self, key):
+        return os.path.join(self.directory, f"chunk_{self.seed}_{key[0]}_{key[1]}_{self.chunk_size}.npy")
+
+    def chunk_level(self, key):
+        # Chunks further from the start are harder and hold more items
+        return self.level + abs(key[0]) + abs(key[1])
+
+    def doors(self, border):
+        # Odd offsets along a border always face a carved cell on both sides
+        rng = random.Random(f"{self.seed}:{border}")
+        return rng.sample(range(1, self.chunk_size - 1, 2), CHUNK_DOORS)
+
+    def generate_chunk(self, key):
+        cx, cy = key
+        seed = random.Random(f"{self.seed}:{cx}:{cy}").getrandbits(32)
+        maze = Maze(self.chunk_level(key), self.chunk_size, seed=seed)
+        grid = maze.grid
+        grid[(grid == Cell.START) | (grid == Cell.EXIT)] = Cell.PATH
+
+        # Stitch to the neighbours: right/left and bottom/top borders
+        last = self.chunk_size - 1
+        for i in self.doors(f"x:{cx}:{cy}"):
+            grid[i, last] = Cell.PATH
+        for i in self.doors(f"x:{cx - 1}:{cy}"):
+            grid[i, 0] = Cell.PATH
+        for i in self.doors(f"y:{cx}:{cy}"):
+            grid[last, i] = Cell.PATH
+        for i in self.doors(f"y:{cx}:{cy - 1}"):
+            grid[0, i] = Cell.PATH
+        maze.neighbor_counts = None
+        return maze
+
+    def load_chunk(self, key):
+        if self.directory:
+            try:
+                grid = np.load(self.chunk_path(key))
+                return Maze(self.chunk_level(key), grid=grid)
+            except (OSError, ValueError):
+                pass
+        maze = self.generate_chunk(key)
+        for x, y in self.collected.get(key, ()):
+            maze.collect_item(x, y)
+        maze.dirty_cells.clear()
+        return maze
+
+    def get_chunk(self, key):
+        maze = self.chunks.get(key)
+        if maze is not None:
+            self.chunks.move_to_end(key)
+            return maze
+
+        maze = self.load_chunk(key)
+        self.chunks[key] = maze
+        while len(self.chunks) > self.cache_size:
+            self.evict(*self.chunks.popitem(last=False))
+        return maze
+
+    def evict(self, key, maze):
+        if key not in self.modified:
+            return
+        self.modified.discard(key)
+        if not self.directory:
+            return
+        try:
+            path = self.chunk_path(key)
+            temp_path = path + '.tmp.npy'
+            np.save(temp_path, maze.grid)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Could not save chunk {key} - {str(e)}")
+
+    def load_around(self, pos, radius=CHUNK_LOAD_RADIUS):
+        # Generate the chunks near a position ahead of the player reaching them
+        cx, cy = self.chunk_key(*pos)
+        for dy in range(-radius, radius + 1):
+            for dx in range(-radius, radius + 1):
+                self.get_chunk((cx + dx, cy + dy))
+
+    def follow(self, pos, radius=CHUNK_LOAD_RADIUS):
+        """Keep the chunks around pos loaded; True when the search window moved"""
+        key = self.chunk_key(*pos)
+        if key == self.center:
+            return False
+        self.center = key
+        self.load_around(pos, radius)
+        cells = (2 * radius + 1) * self.chunk_size
+        self.window = ((key[0] - radius) * self.chunk_size,
+                       (key[1] - radius) * self.chunk_size, cells, cells)
+        self.pathfinder = None
+        self.player_distances = None
+        return True
+
+    def in_window(self, x, y):
+        left, top, width, height = self.window
+        return left <= x < left + width and top <= y < top + height
+
+    def get_pathfinder(self):
+        # Searches only see the window; cells outside it count as walls
+        if self.pathfinder is None:
+            left, top, width, height = self.window
+            self.pathfinder = PathFinder(self.region(left, top, width, height), origin=(left, top))
+        return self.pathfinder
+
+    def get_player_distances(self, player_pos):
+        # BFS from the player over the window, redone once the player is in a new cell
+        player_cell = tuple(player_pos)
+        if self.player_distances is None or player_cell != self.player_cell:
+            self.player_distances = self.get_pathfinder().distance_field([player_cell])
+            self.player_cell = player_cell
+        return self.player_distances
+
+    def get_start_distances(self):
+        # The window moves, so there is nothing worth keeping from the start
+        return self.get_player_distances(self.start_pos)
+
+    def get_route_distance(self, pos):
+        # There is no exit, so no route for the player to stray from
+        return -1
+
+    def flush(self):
+        # Page every modified chunk out, e.g. before quitting
+        for key in list(self.modified):
+            self.evict(key, self.chunks[key])
+
+    def is_valid_move(self, x, y):
+        return self.get_cell(x, y) != Cell.WALL
+
+    def get_cell(self, x, y):
+        size = self.chunk_size
+        return self.get_chunk((x // size, y // size)).grid[y % size, x % size]
+
+    def collect_item(self, x, y):
+        size = self.chunk_size
+        key = (x // size, y // size)
+        item = self.get_chunk(key).collect_item(x % size, y % size)
+        if item:
+            self.modified.add(key)
+            self.collected.setdefault(key, []).append((x % size, y % size))
+            self.dirty_cells.append((x, y))
+        return item
+
+    def region(self, x, y, width, height):
+        """Dense copy of the world cells in a rectangle, for rendering or search"""
+        size = self.chunk_size
+        grid = np.empty((height, width), dtype=np.uint8)
+        for cy in range(y // size, (y + height - 1) // size + 1):
+            for cx in range(x // size, (x + width - 1) // size + 1):
+                # Overlap of this chunk with the rectangle, in world cells
+                left = max(x, cx * size)
+                top = max(y, cy * size)
+                right = min(x + width, (cx + 1) * size)
+                bottom = min(y + height, (cy + 1) * size)
+                chunk = self.get_chunk((cx, cy)).grid
+                grid[top - y:bottom - y, left - x:right - x] = \
+                    chunk[top - cy * size:bottom - cy * size, left - cx * size:right - cx * size]
+        return grid
@@ -1,29 +1,41 @@
 import pygame
 import sys
 import os
-from .maze import Maze
-from .player import Player
-from .enemy import Enemy
+from .simulation import Simulation
+from .camera import Camera
+from .level_pipeline import LevelPipeline
+from .replay import Replay
+from .particles import ParticleSystem
+from .input_queue import InputQueue
+from .sprite_cache import sprite_cache
 from ..utils.constants import *
+from ..utils.profiler import profiler
 
-class Game:
-    def __init__(self):
+class Game(Simulation):
+    def __init__(self, endless=False):
         pygame.init()
         pygame.mixer.init()
         
         # Calculate window size based on grid size
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.screen = self.create_display()
         pygame.display.set_caption("Modern Maze Game")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, FONT_SIZE)
         self.small_font = pygame.font.Font(None, SMALL_FONT_SIZE)
-        
-        self.level = 1
-        self.score = 0
-        self.high_score = self.load_high_score()
-        self.state = MENU
-        self.countdown = COUNTDOWN_DURATION
-        self.immunity = IMMUNITY_DURATION
+        self.tiny_font = pygame.font.Font(None, TINY_FONT_SIZE)
+
+        # The maze scrolls inside a fixed viewport that follows the player
+        self.camera = Camera()
+        self.viewport = pygame.Rect(self.camera.viewport())
+
+        # Profiling is opt-in: MAZE_PROFILE=frames.csv (or .json) turns it on
+        # and names the file the frame timings are written to on exit
+        self.profile_path = os.environ.get(PROFILE_ENV_VAR)
+        profiler.enabled = bool(self.profile_path)
+        self.profiler_text = None
+
+        # Key presses are buffered here and handed out one tick at a time
+        self.input = InputQueue()
         
         # Initialize sounds dictionary
         self.sounds = {}
@@ -39,20 +51,45 @@ class Game:
             except Exception as e:
                 print(f"Could not load sound: {file} - {str(e)}")
         
-        self.reset_game()
+        # Upcoming levels are generated in background processes
+        super().__init__(level_pipeline=LevelPipeline(), particles=ParticleSystem(),
+                         endless=endless)
+        self.high_score = self.load_high_score()
+        # Wait on the title screen until SPACE is pressed
+        self.state = MENU
         
         # Start background music if available
         if 'background' in self.sounds:
             self.sounds['background'].play(-1)  # Loop indefinitely
 
+    def create_display(self):
+        if VSYNC:
+            # Vsync needs a renderer-backed window; fall back to a plain one
+            try:
+                return pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SCALED, vsync=1)
+            except pygame.error as e:
+                print(f"Could not enable vsync - {str(e)}")
+        return pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+
     def reset_game(self):
-        self.maze = Maze(self.level)
-        self.player = Player()
-        self.enemy = Enemy(self.level)
-        self.score = 0
-        self.state = PLAYING
-        self.countdown = COUNTDOWN_DURATION
-        self.immunity = IMMUNITY_DURATION
+        super().reset_game()
+        self.particles.clear()
+        # Everyone starts afresh, so there is nothing to interpolate from
+        self.previous_positions = {}
+        # The static maze layer is rebuilt on the next draw
+        self.maze_surface = None
+
+    def update(self, dt):
+        # Where everything was before this tick, for drawing between ticks
+        self.previous_positions = {entity: (entity.x, entity.y)
+                                   for entity in [self.player] + self.enemies}
+        super().update(dt)
+        if self.state == PLAYING:
+            self.particles.update(dt)
+
+    def play_sound(self, name):
+        if name in self.sounds:
+            self.sounds[name].play()
 
     def load_high_score(self):
         try:
@@ -68,103 +105,57 @@ class Game:
         except:
             pass  # Silently fail if we can't save the high score
 
-    def handle_input(self):
-        keys = pygame.key.get_pressed()
-        
-        if self.state == PLAYING:
-            # Movement keys (WASD and Arrow keys)
-            dx = (keys[pygame.K_d] or keys[pygame.K_RIGHT]) - (keys[pygame.K_a] or keys[pygame.K_LEFT])
-            dy = (keys[pygame.K_s] or keys[pygame.K_DOWN]) - (keys[pygame.K_w] or keys[pygame.K_UP])
-            
-            # Only move if one direction is pressed at a time
-            if dx != 0 and dy == 0:
-                self.player.move(dx, 0, self.maze)
-            elif dy != 0 and dx == 0:
-                self.player.move(0, dy, self.maze)
-            
-            # Pause game
-            if keys[pygame.K_ESCAPE]:
-                self.state = PAUSED
-        
-        elif self.state == PAUSED:
-            # Resume game
-            if keys[pygame.K_ESCAPE]:
-                self.state = PLAYING
-            # Restart game
-            elif keys[pygame.K_r]:
-                self.reset_game()
-        
-        elif self.state == GAME_OVER:
-            # Restart game
-            if keys[pygame.K_r]:
-                self.level = 1
-                self.score = 0
-                self.reset_game()
-
-    def update(self, dt):
-        if self.state != PLAYING:
+    def save_replay(self):
+        # Quitting from the title screen leaves nothing to replay; keep the
+        # last session that was actually played
+        if not self.recorded_actions or self.state == MENU:
             return
+        try:
+            Replay.from_simulation(self).save(REPLAY_PATH)
+        except Exception as e:
+            print(f"Could not save replay - {str(e)}")
 
-        # Update countdown and immunity
-        if self.countdown > 0:
-            self.countdown -= dt
-            return
+    def quit(self):
+        self.save_replay()
+        if self.profile_path:
+            profiler.export(self.profile_path)
+        self.level_pipeline.close()
+        pygame.quit()
+        sys.exit()
+
+    @profiler.timed('handle_input')
+    def handle_input(self):
+        # Feed this frame's key presses and releases to the input queue
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.quit()
+            self.input.handle_event(event)
+
+    def step(self, actions=0):
+        # Nothing is simulated or recorded on the title screen, so a replay
+        # starts where play did
+        if self.state == MENU:
+            if actions & ACTION_PAUSE:
+                self.quit()
+            self.apply_actions(actions)
+            return self.state
+        return super().step(actions)
 
-        if self.immunity > 0:
-            self.immunity -= dt
-
-        # Update player and enemy
-        self.player.update(dt)
-        self.enemy.update(dt, self.maze, self.player)
-
-        # Check collisions
-        player_pos = self.player.get_position()
-        enemy_pos = self.enemy.get_position()
-
-        # Check enemy collision
-        if (player_pos == enemy_pos and 
-            self.immunity <= 0 and 
-            not self.player.power_up_active):
-            self.state = GAME_OVER
-            if self.score > self.high_score:
-                self.high_score = self.score
-                self.save_high_score()
-            if 'game_over' in self.sounds:
-                self.sounds['game_over'].play()
-
-        # Check item collection
-        item = self.maze.collect_item(*player_pos)
-        if item == 'coin':
-            self.score += 10
-            if 'coin' in self.sounds:
-                self.sounds['coin'].play()
-        elif item == 'power_up':
-            self.player.activate_power_up(POWER_UP_DURATION)
-            if 'powerup' in self.sounds:
-                self.sounds['powerup'].play()
-
-        # Check level completion
-        if self.maze.get_cell(*player_pos) == Cell.EXIT:
-            self.level += 1
-            self.score += 50
-            if 'level_complete' in self.sounds:
-                self.sounds['level_complete'].play()
-            self.reset_game()
-
-    def draw_maze_cell(self, x, y, cell_type):
+    def draw_maze_cell(self, x, y, cell_type, surface, origin):
+        # origin is where world cell (0, 0) sits on the surface
         rect = pygame.Rect(
-            PADDING + x * CELL_SIZE,
-            PADDING + y * CELL_SIZE,
+            origin[0] + x * CELL_SIZE,
+            origin[1] + y * CELL_SIZE,
             CELL_SIZE,
             CELL_SIZE
         )
         
         if cell_type == Cell.WALL:
-            pygame.draw.rect(self.screen, GRID_BLUE, rect)
+            pygame.draw.rect(surface, GRID_BLUE, rect)
         elif cell_type == Cell.START:
             # Draw start cell with arrow
-            pygame.draw.rect(self.screen, DARK_BLUE, rect)
-            pygame.draw.rect(self.screen, NEON_BLUE, rect, 2)
+            pygame.draw.rect(surface, DARK_BLUE, rect)
+            pygame.draw.rect(surface, NEON_BLUE, rect, 2)
             
             # Draw arrow
             arrow_points = [
@@ -176,94 +167,230 @@ class Game:
                 (rect.centerx + 4, rect.centery + 2),
                 (rect.centerx + 4, rect.centery + 6),
             ]
-            pygame.draw.polygon(self.screen, NEON_BLUE, arrow_points)
+            pygame.draw.polygon(surface, NEON_BLUE, arrow_points)
             
         elif cell_type == Cell.EXIT:
             # Draw exit cell with X
-            pygame.draw.rect(self.screen, DARK_BLUE, rect)
-            pygame.draw.rect(self.screen, LIGHT_BLUE, rect, 2)
+            pygame.draw.rect(surface, DARK_BLUE, rect)
+            pygame.draw.rect(surface, LIGHT_BLUE, rect, 2)
             
             # Draw X
             margin = 6
-            pygame.draw.line(self.screen, LIGHT_BLUE,
+            pygame.draw.line(surface, LIGHT_BLUE,
                            (rect.left + margin, rect.top + margin),
                            (rect.right - margin, rect.bottom - margin), 2)
-            pygame.draw.line(self.screen, LIGHT_BLUE,
+            pygame.draw.line(surface, LIGHT_BLUE,
                            (rect.right - margin, rect.top + margin),
                            (rect.left + margin, rect.bottom - margin), 2)
             
         elif cell_type == Cell.COIN:
             # Draw coin
-            pygame.draw.rect(self.screen, DARK_BLUE, rect)
+            pygame.draw.rect(surface, DARK_BLUE, rect)
             center = rect.center
             radius = CELL_SIZE // 4
             
             # Draw glow
-            glow_surface = pygame.Surface((CELL_SIZE * 2, CELL_SIZE * 2), pygame.SRCALPHA)
-            pygame.draw.circle(glow_surface, (*NEON_BLUE, 50), 
-                             (CELL_SIZE, CELL_SIZE), radius * 1.5)
-            self.screen.blit(glow_surface, 
-                           (center[0] - CELL_SIZE,
-                            center[1] - CELL_SIZE))
+            glow_surface = sprite_cache.item_glow(Cell.COIN, CELL_SIZE)
+            surface.blit(glow_surface, 
+                         (center[0] - CELL_SIZE,
+                          center[1] - CELL_SIZE))
             
             # Draw coin
-            pygame.draw.circle(self.screen, NEON_BLUE, center, radius)
-            pygame.draw.circle(self.screen, LIGHT_BLUE, center, radius, 2)
+            pygame.draw.circle(surface, NEON_BLUE, center, radius)
+            pygame.draw.circle(surface, LIGHT_BLUE, center, radius, 2)
             
         elif cell_type == Cell.POWER_UP:
             # Draw power-up
-            pygame.draw.rect(self.screen, DARK_BLUE, rect)
+            pygame.draw.rect(surface, DARK_BLUE, rect)
             center = rect.center
             size = CELL_SIZE // 3
             
             # Draw glow
-            glow_surface = pygame.Surface((CELL_SIZE * 2, CELL_SIZE * 2), pygame.SRCALPHA)
-            pygame.draw.rect(glow_surface, (*LIGHT_BLUE, 50), 
-                           pygame.Rect(CELL_SIZE - size, CELL_SIZE - size,
-                                     size * 2, size * 2))
-            self.screen.blit(glow_surface, 
-                           (center[0] - CELL_SIZE,
-                            center[1] - CELL_SIZE))
+            glow_surface = sprite_cache.item_glow(Cell.POWER_UP, CELL_SIZE)
+            surface.blit(glow_surface, 
+                         (center[0] - CELL_SIZE,
+                          center[1] - CELL_SIZE))
             
             # Draw power-up
-            pygame.draw.rect(self.screen, LIGHT_BLUE,
+            pygame.draw.rect(surface, LIGHT_BLUE,
                            pygame.Rect(center[0] - size, center[1] - size,
                                      size * 2, size * 2))
-            pygame.draw.rect(self.screen, NEON_BLUE,
+            pygame.draw.rect(surface, NEON_BLUE,
                            pygame.Rect(center[0] - size, center[1] - size,
                                      size * 2, size * 2), 2)
         else:
-            pygame.draw.rect(self.screen, DARK_BLUE, rect)
+            pygame.draw.rect(surface, DARK_BLUE, rect)
 
-    def draw(self):
-        # Clear screen
-        self.screen.fill(DARK_BLUE)
-        
-        # Draw maze
-        for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
+        return rect
+
+    def render_background(self):
+        # Screen-sized copy of everything behind the entities: the visible
+        # part of the maze and the UI background
+        self.maze_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.maze_surface.fill(DARK_BLUE)
+
+        ui_y = self.viewport.bottom + PADDING
+        ui_surface = pygame.Surface((WINDOW_WIDTH, UI_HEIGHT), pygame.SRCALPHA)
+        pygame.draw.rect(ui_surface, UI_BG_COLOR, ui_surface.get_rect())
+        self.maze_surface.blit(ui_surface, (0, ui_y))
+        profiler.count('surfaces.allocated', 2)
+
+        self.maze_layer = None
+        self.entity_rects = []
+
+    def render_maze_layer(self):
+        # Pre-render the cells around the view, so scrolling is a single blit
+        # until the view reaches the edge of this layer
+        left, top, right, bottom = self.camera.visible_cells()
+        margin = VIEW_LAYER_MARGIN
+        cells = self.camera.view_size + 1 + 2 * margin
+        self.layer_cells = pygame.Rect(left - margin, top - margin, cells, cells)
+        self.maze_layer = pygame.Surface((cells * CELL_SIZE, cells * CELL_SIZE)).convert()
+        self.maze_layer.fill(DARK_BLUE)
+        profiler.count('surfaces.allocated')
+
+        # Mazes with a size have nothing to draw past their edges
+        area = self.layer_cells
+        if self.maze.size is not None:
+            area = area.clip(pygame.Rect(0, 0, self.maze.size, self.maze.size))
+        origin = self.layer_origin()
+        for y in range(area.top, area.bottom):
+            for x in range(area.left, area.right):
                 cell_type = self.maze.get_cell(x, y)
-                self.draw_maze_cell(x, y, cell_type)
-        
-        # Draw player and enemy
-        self.player.draw(self.screen, CELL_SIZE, PADDING)
-        self.enemy.draw(self.screen, CELL_SIZE, PADDING)
-        
+                self.draw_maze_cell(x, y, cell_type, self.maze_layer, origin)
+
+        self.maze.dirty_cells.clear()
+        self.view_offset = None
+
+    def layer_origin(self):
+        return (-self.layer_cells.left * CELL_SIZE, -self.layer_cells.top * CELL_SIZE)
+
+    def layer_position(self, offset):
+        # Screen position of the layer's top-left corner
+        return (offset[0] + self.layer_cells.left * CELL_SIZE,
+                offset[1] + self.layer_cells.top * CELL_SIZE)
+
+    def render_position(self, entity, alpha):
+        # Where to draw an entity, alpha of the way from its previous tick
+        previous = self.previous_positions.get(entity)
+        if previous is None or alpha >= 1:
+            return (entity.x, entity.y)
+        return (previous[0] + (entity.x - previous[0]) * alpha,
+                previous[1] + (entity.y - previous[1]) * alpha)
+
+    def get_entity_rect(self, entity, offset, position):
+        # Trails, glow and the rotated body all stay within 1.5 cells of the
+        # drawn position or one of the trail points
+        points = list(entity.trail.points) + [position]
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        reach = CELL_SIZE * 1.5
+        left = offset[0] + int(min(xs) * CELL_SIZE + CELL_SIZE/2 - reach)
+        top = offset[1] + int(min(ys) * CELL_SIZE + CELL_SIZE/2 - reach)
+        right = offset[0] + int(max(xs) * CELL_SIZE + CELL_SIZE/2 + reach) + 1
+        bottom = offset[1] + int(max(ys) * CELL_SIZE + CELL_SIZE/2 + reach) + 1
+        rect = pygame.Rect(left, top, right - left, bottom - top)
+        return rect.clip(self.viewport)
+
+    def render_text(self, font, text):
+        profiler.count('surfaces.allocated')
+        return font.render(text, True, UI_TEXT_COLOR)
+
+    @profiler.timed('draw.maze')
+    def draw_maze(self, dirty_rects, alpha):
+        player_x, player_y = self.render_position(self.player, alpha)
+        self.camera.follow(player_x, player_y, self.maze.size)
+        offset = self.camera.offset()
+
+        if self.maze_surface is None:
+            # New level: put the whole background on screen
+            self.render_background()
+            dirty_rects.append(self.screen.get_rect())
+
+        left, top, right, bottom = self.camera.visible_cells()
+        if (self.maze_layer is None or
+                not self.layer_cells.contains(pygame.Rect(left, top, right - left, bottom - top))):
+            self.render_maze_layer()
+
+        layer_position = self.layer_position(offset)
+        if offset != self.view_offset:
+            # The camera moved: show the layer at its new position
+            self.maze_surface.set_clip(self.viewport)
+            self.maze_surface.blit(self.maze_layer, layer_position)
+            self.maze_surface.set_clip(None)
+            dirty_rects.append(self.viewport)
+            self.view_offset = offset
+
+        # Redraw only the maze cells that changed, e.g. collected items
+        origin = self.layer_origin()
+        for x, y in self.maze.dirty_cells:
+            if not self.layer_cells.collidepoint(x, y):
+                continue  # picked up when the layer is next rendered
+            cell_type = self.maze.get_cell(x, y)
+            rect = self.draw_maze_cell(x, y, cell_type, self.maze_layer, origin)
+            screen_rect = rect.move(layer_position).clip(self.viewport)
+            self.maze_surface.blit(self.maze_layer, screen_rect,
+                                   screen_rect.move(-layer_position[0], -layer_position[1]))
+            dirty_rects.append(screen_rect)
+        self.maze.dirty_cells.clear()
+
+        # Restore the background where things were drawn last frame
+        dirty_rects.extend(self.entity_rects)
+        for rect in dirty_rects:
+            self.screen.blit(self.maze_surface, rect, rect)
+
+    @profiler.timed('draw.entities')
+    def draw_entities(self, dirty_rects, alpha):
+        # Draw player and enemies, looking up only those near the view
+        offset = self.camera.offset()
+        left, top, right, bottom = self.camera.visible_cells()
+        nearby = self.entity_index.in_area(left - CULL_MARGIN, top - CULL_MARGIN,
+                                           right + CULL_MARGIN, bottom + CULL_MARGIN)
+        self.entity_rects = []
+        self.screen.set_clip(self.viewport)
+
+        # Particles go under the entities, in one batch
+        particle_rect = self.particles.draw(self.screen, CELL_SIZE, offset, self.viewport)
+        if particle_rect:
+            self.entity_rects.append(particle_rect)
+
+        for entity in [self.player] + [e for e in nearby if e is not self.player]:
+            position = self.render_position(entity, alpha)
+            rect = self.get_entity_rect(entity, offset, position)
+            if rect.width and rect.height:
+                entity.draw(self.screen, CELL_SIZE, offset, position)
+                self.entity_rects.append(rect)
+        self.screen.set_clip(None)
+        dirty_rects.extend(self.entity_rects)
+
+    def draw_profiler_overlay(self, ui_y):
+        # Percentiles are recomputed a few times a second, not every frame
+        if self.profiler_text is None or profiler.frame_count % PROFILE_OVERLAY_INTERVAL == 0:
+            parts = []
+            for name, label in (('frame', 'frame'), ('update', 'update'), ('draw', 'draw')):
+                p50, p99 = profiler.percentiles(name)
+                parts.append(f"{label} {p50:.1f}/{p99:.1f}")
+            text = "p50/p99 ms: " + "  ".join(parts)
+            profiler.count('surfaces.allocated')
+            self.profiler_text = self.tiny_font.render(text, True, UI_TEXT_COLOR)
+
+        self.screen.blit(self.profiler_text,
+                         (WINDOW_WIDTH - self.profiler_text.get_width() - UI_PADDING,
+                          ui_y + UI_HEIGHT - self.profiler_text.get_height() - 2))
+
+    @profiler.timed('draw.ui')
+    def draw_ui(self):
         # Draw UI in separate area below maze
-        ui_y = GRID_SIZE * CELL_SIZE + 2 * PADDING
+        ui_y = self.viewport.bottom + PADDING
         ui_rect = pygame.Rect(0, ui_y, WINDOW_WIDTH, UI_HEIGHT)
-        
-        # Draw UI background
-        ui_surface = pygame.Surface((WINDOW_WIDTH, UI_HEIGHT), pygame.SRCALPHA)
-        pygame.draw.rect(ui_surface, UI_BG_COLOR, ui_surface.get_rect())
-        self.screen.blit(ui_surface, (0, ui_y))
+        self.screen.blit(self.maze_surface, ui_rect, ui_rect)
         
         # Draw UI elements
         if self.state == MENU:
             # Draw menu text
-            title = self.font.render("MAZE RUNNER", True, UI_TEXT_COLOR)
-            start_text = self.small_font.render("Press SPACE to Start", True, UI_TEXT_COLOR)
-            controls_text = self.small_font.render("WASD or Arrow keys to move | ESC to pause", True, UI_TEXT_COLOR)
+            title = self.render_text(self.font, "MAZE RUNNER")
+            start_text = self.render_text(self.small_font, "Press SPACE to Start")
+            controls_text = self.render_text(self.small_font, "WASD or Arrow keys to move | ESC to pause")
             
             self.screen.blit(title, (WINDOW_WIDTH//2 - title.get_width()//2, ui_y + 10))
             self.screen.blit(start_text, (WINDOW_WIDTH//2 - start_text.get_width()//2, ui_y + 40))
@@ -271,9 +398,9 @@ class Game:
             
         elif self.state == PLAYING:
             # Draw game info
-            score_text = self.font.render(f"Score: {self.score}", True, UI_TEXT_COLOR)
-            level_text = self.font.render(f"Level: {self.level}", True, UI_TEXT_COLOR)
-            high_score_text = self.small_font.render(f"High Score: {self.high_score}", True, UI_TEXT_COLOR)
+            score_text = self.render_text(self.font, f"Score: {self.score}")
+            level_text = self.render_text(self.font, f"Level: {self.level}")
+            high_score_text = self.render_text(self.small_font, f"High Score: {self.high_score}")
             
             self.screen.blit(score_text, (UI_PADDING, ui_y + 10))
             self.screen.blit(level_text, (WINDOW_WIDTH//2 - level_text.get_width()//2, ui_y + 10))
@@ -281,19 +408,19 @@ class Game:
             
             # Draw countdown if active
             if self.countdown > 0:
-                countdown_text = self.font.render(f"Get Ready: {int(self.countdown)}", True, UI_TEXT_COLOR)
+                countdown_text = self.render_text(self.font, f"Get Ready: {int(self.countdown)}")
                 self.screen.blit(countdown_text, (WINDOW_WIDTH//2 - countdown_text.get_width()//2, ui_y + 40))
             
             # Draw immunity timer if active
             if self.immunity > 0:
-                immunity_text = self.small_font.render(f"Immunity: {int(self.immunity)}s", True, UI_TEXT_COLOR)
+                immunity_text = self.render_text(self.small_font, f"Immunity: {int(self.immunity)}s")
                 self.screen.blit(immunity_text, (WINDOW_WIDTH//2 - immunity_text.get_width()//2, ui_y + 40))
             
         elif self.state == PAUSED:
             # Draw pause text
-            pause_text = self.font.render("PAUSED", True, UI_TEXT_COLOR)
-            resume_text = self.small_font.render("Press ESC to Resume", True, UI_TEXT_COLOR)
-            restart_text = self.small_font.render("Press R to Restart", True, UI_TEXT_COLOR)
+            pause_text = self.render_text(self.font, "PAUSED")
+            resume_text = self.render_text(self.small_font, "Press ESC to Resume")
+            restart_text = self.render_text(self.small_font, "Press R to Restart")
             
             self.screen.blit(pause_text, (WINDOW_WIDTH//2 - pause_text.get_width()//2, ui_y + 10))
             self.screen.blit(resume_text, (WINDOW_WIDTH//2 - resume_text.get_width()//2, ui_y + 40))
@@ -301,33 +428,47 @@ class Game:
             
         elif self.state == GAME_OVER:
             # Draw game over text
-            game_over_text = self.font.render("GAME OVER", True, UI_TEXT_COLOR)
-            score_text = self.font.render(f"Final Score: {self.score}", True, UI_TEXT_COLOR)
-            restart_text = self.small_font.render("Press R to Play Again", True, UI_TEXT_COLOR)
+            game_over_text = self.render_text(self.font, "GAME OVER")
+            score_text = self.render_text(self.font, f"Final Score: {self.score}")
+            restart_text = self.render_text(self.small_font, "Press R to Play Again")
             
             self.screen.blit(game_over_text, (WINDOW_WIDTH//2 - game_over_text.get_width()//2, ui_y + 10))
             self.screen.blit(score_text, (WINDOW_WIDTH//2 - score_text.get_width()//2, ui_y + 40))
             self.screen.blit(restart_text, (WINDOW_WIDTH//2 - restart_text.get_width()//2, ui_y + 60))
         
-        # Update display
-        pygame.display.flip()
+        if profiler.enabled:
+            self.draw_profiler_overlay(ui_y)
+
+        return ui_rect
+
+    @profiler.timed('draw')
+    def draw(self, alpha=1.0):
+        # alpha is how far the frame falls between the last two ticks
+        dirty_rects = []
+        self.draw_maze(dirty_rects, alpha)
+        self.draw_entities(dirty_rects, alpha)
+        dirty_rects.append(self.draw_ui())
+        
+        # Push only the changed areas to the display
+        pygame.display.update(dirty_rects)
 
     def run(self):
+        # Real time not yet simulated; it is used up in fixed ticks
+        accumulator = 0.0
         while True:
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+            # Frames come as fast as the cap (or vsync) allows. A long hitch
+            # is only partly caught up on rather than replayed in a burst.
+            frame_time = self.clock.tick(0 if VSYNC else FPS) / 1000
+            accumulator += min(frame_time, MAX_FRAME_TIME)
+            profiler.start_frame()
 
-            # Get delta time
-            dt = self.clock.tick(60) / 1000.0
-
-            # Handle input
+            # Handle input and run as many fixed ticks as real time allows;
+            # a queued move goes out once the player has finished its last
             self.handle_input()
+            while accumulator >= self.timestep:
+                self.step(self.input.next_actions(not self.player.current_direction))
+                accumulator -= self.timestep
 
-            # Update game state
-            self.update(dt)
-
-            # Draw everything
-            self.draw() 
\ No newline at end of file
+            # Draw everything between the last two ticks
+            self.draw(accumulator / self.timestep)
+            profiler.end_frame() 
\ No newline at end of file
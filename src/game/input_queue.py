@@ -0,0 +1,61 @@
+from collections import deque
+import pygame
+from src.utils.constants import *
+
+# Keys and the actions they stand for
+KEY_ACTIONS = {
+    pygame.K_w: ACTION_UP, pygame.K_UP: ACTION_UP,
+    pygame.K_s: ACTION_DOWN, pygame.K_DOWN: ACTION_DOWN,
+    pygame.K_a: ACTION_LEFT, pygame.K_LEFT: ACTION_LEFT,
+    pygame.K_d: ACTION_RIGHT, pygame.K_RIGHT: ACTION_RIGHT,
+    pygame.K_ESCAPE: ACTION_PAUSE,
+    pygame.K_r: ACTION_RESTART,
+    pygame.K_SPACE: ACTION_START,
+}
+MOVE_ACTIONS = (ACTION_UP, ACTION_DOWN, ACTION_LEFT, ACTION_RIGHT)
+
+class InputQueue:
+    """Keyboard events turned into one ACTION_* mask per simulation tick.
+
+    Presses come from the event queue, so pausing, restarting and starting
+    fire once per press however long the key is held. Moves are queued as
+    they are typed and handed out one per cell, when the player has
+    finished the last one; a movement key held down repeats once the queue
+    is empty.
+    """
+    def __init__(self, size=INPUT_QUEUE_SIZE):
+        self.moves = deque(maxlen=size)
+        self.held = []  # movement actions of keys held down, latest last
+        self.pending = 0  # one-shot actions not yet handed to a tick
+
+    def clear(self):
+        self.moves.clear()
+        self.held.clear()
+        self.pending = 0
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            action = KEY_ACTIONS.get(event.key)
+            if action in MOVE_ACTIONS:
+                self.moves.append(action)
+                self.held.append(action)
+            elif action:
+                self.pending |= action
+        elif event.type == pygame.KEYUP:
+            action = KEY_ACTIONS.get(event.key)
+            if action in self.held:
+                self.held.remove(action)
+        elif event.type == pygame.WINDOWFOCUSLOST:
+            # Key releases go elsewhere now; don't leave a key stuck down
+            self.held.clear()
+
+    def next_actions(self, ready):
+        """Mask for the next tick; ready says whether the player can take a move"""
+        actions = self.pending
+        self.pending = 0
+        if ready:
+            if self.moves:
+                actions |= self.moves.popleft()
+            elif self.held:
+                actions |= self.held[-1]
+        return actions
@@ -0,0 +1,110 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.game.maze import Maze
+from src.utils.constants import *
+
+def maze_path(directory, level, seed, size):
+    return os.path.join(directory, f"maze_{level}_{seed}_{size}.npz")
+
+def generate_maze_file(directory, level, seed, size):
+    path = maze_path(directory, level, seed, size)
+    if not os.path.exists(path):
+        maze = Maze(level, size, seed=seed)
+        # The exit route and its distance fields are built here as well, so
+        # setting up the level on the main thread only has to load them.
+        # Write under a temporary name so readers never see a partial file.
+        temp_path = path + '.tmp.npz'
+        np.savez(temp_path, **maze.export_fields())
+        os.replace(temp_path, path)
+    return level, seed, size
+
+class LevelPipeline:
+    """Generates upcoming mazes in a process pool and caches them on disk.
+
+    Mazes are stored as .npz files keyed by (level, seed, size), holding
+    the uint8 grid and the fields Maze.export_fields() builds from it, so a
+    seed always maps to the same layout whichever process built it. take()
+    hands out a finished maze without waiting, or returns None so the caller
+    can generate that same seed synchronously. Each file is deleted once
+    taken, and mazes that stop being expected are dropped, since a new
+    session's seeds never ask for them again.
+    """
+    def __init__(self, size=GRID_SIZE, lookahead=PREGENERATE_LEVELS,
+                 workers=PREGENERATE_WORKERS, directory=MAZE_CACHE_DIR):
+        self.size = size
+        self.lookahead = lookahead
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.prune()
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.pending = {}  # (level, seed) -> future still being generated
+
+    def prefetch(self, levels):
+        # levels holds (level, seed) pairs the game expects to need soon;
+        # anything still queued from before that isn't among them is stale
+        levels = list(levels)
+        for key in [key for key in self.pending if key not in levels]:
+            self.discard(key)
+
+        for level, seed in levels:
+            if (level, seed) in self.pending:
+                continue
+            if os.path.exists(maze_path(self.directory, level, seed, self.size)):
+                continue
+            self.pending[(level, seed)] = self.executor.submit(
+                generate_maze_file, self.directory, level, seed, self.size)
+
+    def take(self, level, seed):
+        future = self.pending.get((level, seed))
+        if future is not None:
+            if not future.done():
+                return None
+            del self.pending[(level, seed)]
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Could not pre-generate level {level} - {str(e)}")
+                return None
+
+        try:
+            with np.load(maze_path(self.directory, level, seed, self.size)) as fields:
+                maze = Maze(level, grid=fields['grid'], seed=seed)
+                maze.import_fields(fields)
+        except (OSError, ValueError, KeyError):
+            return None
+        self.remove_file(level, seed)
+        return maze
+
+    def discard(self, key):
+        # Forget a maze nobody will ask for, and its file if it was written
+        future = self.pending.pop(key)
+        future.cancel()
+        self.remove_file(*key)
+
+    def remove_file(self, level, seed):
+        try:
+            os.remove(maze_path(self.directory, level, seed, self.size))
+        except OSError:
+            pass
+
+    def prune(self, keep=MAZE_CACHE_FILES):
+        # Files an earlier session never took; keep only the newest few
+        try:
+            paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                     if name.endswith(('.npy', '.npz'))]
+            paths.sort(key=os.path.getmtime, reverse=True)
+            for path in paths[keep:]:
+                os.remove(path)
+        except OSError as e:
+            print(f"Could not prune the maze cache - {str(e)}")
+
+    def close(self):
+        # Drop queued jobs; only mazes already being built are waited for
+        for future in self.pending.values():
+            future.cancel()
+        self.executor.shutdown(wait=True)
+        # Nothing will take what is left over now
+        for level, seed in self.pending:
+            self.remove_file(level, seed)
+        self.pending.clear()
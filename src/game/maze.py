@@ -1,115 +1,276 @@
+import itertools
+from array import array
 import numpy as np
 import random
 from src.utils.constants import *
+from src.game.pathfinding import PathFinder
 
 class Maze:
-    def __init__(self, level):
+    def __init__(self, level, size=GRID_SIZE, grid=None, seed=None):
         self.level = level
-        self.grid = np.zeros((GRID_SIZE, GRID_SIZE), dtype=int)
+        self.seed = seed
+        # Every maze draws from its own stream so a seed reproduces it exactly
+        self.rng = random.Random(seed)
+        self.size = size if grid is None else len(grid)
+        self.grid = np.zeros((self.size, self.size), dtype=np.uint8)
+        self.start_pos = (1, 1)
+        self.exit_pos = None
+        self.pathfinder = None
+        self.exit_distances = None
+        self.start_distances = None
+        self.player_distances = None
+        self.player_cell = None
+        self.neighbor_counts = None
+        self.loop_cells = None
+        self.exit_route = None
+        self.exit_route_cells = None
+        self.exit_route_mask = None
+        self.route_distances = None
+        # Cells whose contents changed since the renderer last looked
+        self.dirty_cells = []
+        # Live coins and power-ups: (x, y) -> cell type
+        self.collectibles = {}
+
+        if grid is not None:
+            # A layout generated earlier, e.g. by the level pipeline
+            self.grid[:, :] = grid
+            exits = np.argwhere(self.grid == Cell.EXIT)
+            if len(exits):
+                self.exit_pos = (int(exits[0][1]), int(exits[0][0]))
+            starts = np.argwhere(self.grid == Cell.START)
+            if len(starts):
+                self.start_pos = (int(starts[0][1]), int(starts[0][0]))
+            self.index_collectibles()
+            return
+
         self.generate_maze()
         self.place_collectibles()
 
+    def carve_paths(self):
+        # Iterative recursive-backtracker on a flat byte buffer. The buffer is
+        # padded by two cells on every side so neighbour lookups never need
+        # bounds checks, and the padding is pre-marked as visited.
+        size = self.size
+        width = size + 4
+        padded = np.ones((width, width), dtype=np.uint8)
+        padded[2:size + 2, 2:size + 2] = Cell.WALL
+        cells = bytearray(padded.tobytes())
+
+        # Every cell gets one of the 24 orderings of (down, right, up, left),
+        # which is what random.shuffle(directions) picked per recursion frame
+        steps = (2 * width, 2, -2 * width, -2)
+        orderings = [tuple((steps[i], steps[i] // 2) for i in perm)
+                     for perm in itertools.permutations(range(4))]
+        rng = np.random.default_rng(self.rng.getrandbits(64))
+        choice = rng.integers(0, len(orderings), size=width * width, dtype=np.uint8).tobytes()
+
+        # Start from position (1, 1). The carved maze is a tree, so the stack
+        # depth of a cell is its true path distance from the start; the
+        # deepest cell is remembered for the exit.
+        path = Cell.PATH
+        current = 3 * width + 3
+        cells[current] = path
+        stack = [current]
+        push = stack.append
+        pop = stack.pop
+        deepest = current
+        max_depth = 1
+        while True:
+            for step, half_step in orderings[choice[current]]:
+                if not cells[current + step]:
+                    # Carve the wall between current and new position
+                    cells[current + half_step] = path
+                    current += step
+                    cells[current] = path
+                    push(current)
+                    if len(stack) > max_depth:
+                        max_depth = len(stack)
+                        deepest = current
+                    break
+            else:
+                pop()
+                if not stack:
+                    break
+                current = stack[-1]
+
+        carved = np.frombuffer(cells, dtype=np.uint8).reshape(width, width)
+        self.grid[:, :] = carved[2:size + 2, 2:size + 2]
+        if max_depth == 1:
+            return None
+        return (deepest % width - 2, deepest // width - 2)
+
     def generate_maze(self):
         # Fill the grid with walls
         self.grid.fill(Cell.WALL)
-        
-        def carve_path(x, y):
-            self.grid[y, x] = Cell.PATH
-            
-            # Define possible directions
-            directions = [(0, 2), (2, 0), (0, -2), (-2, 0)]
-            random.shuffle(directions)
-            
-            for dx, dy in directions:
-                new_x, new_y = x + dx, y + dy
-                if (0 <= new_x < GRID_SIZE and 
-                    0 <= new_y < GRID_SIZE and 
-                    self.grid[new_y, new_x] == Cell.WALL):
-                    # Carve the wall between current and new position
-                    self.grid[y + dy//2, x + dx//2] = Cell.PATH
-                    carve_path(new_x, new_y)
-
-        # Start from position (1, 1)
-        carve_path(1, 1)
+        self.pathfinder = None
+        self.exit_distances = None
+        self.start_distances = None
+        self.player_distances = None
+        self.player_cell = None
+        self.neighbor_counts = None
+        self.loop_cells = None
+        self.exit_route = None
+        self.route_distances = None
+        self.dirty_cells = []
+        furthest = self.carve_paths()
         
         # Set start and exit positions
         self.grid[1, 1] = Cell.START
         
-        # Find a suitable exit position (far from start)
-        max_distance = 0
-        exit_pos = (GRID_SIZE-2, GRID_SIZE-2)
-        
-        for y in range(1, GRID_SIZE-1, 2):
-            for x in range(1, GRID_SIZE-1, 2):
-                if self.grid[y, x] == Cell.PATH:
-                    distance = abs(x - 1) + abs(y - 1)
-                    if distance > max_distance:
-                        max_distance = distance
-                        exit_pos = (x, y)
-        
+        # The exit goes on the cell with the longest path from the start
+        exit_pos = furthest or (self.size-2, self.size-2)
         self.grid[exit_pos[1], exit_pos[0]] = Cell.EXIT
+        self.exit_pos = exit_pos
         
-        # Add some random connections to make the maze more interesting
-        for _ in range(self.level):
-            x = random.randrange(2, GRID_SIZE-2)
-            y = random.randrange(2, GRID_SIZE-2)
-            if self.grid[y, x] == Cell.WALL:
-                # Check if connecting two paths
-                paths_around = 0
-                for dx, dy in [(0, 1), (1, 0), (0, -1), (-1, 0)]:
-                    if (self.grid[y+dy, x+dx] == Cell.PATH or 
-                        self.grid[y+dy, x+dx] == Cell.START or 
-                        self.grid[y+dy, x+dx] == Cell.EXIT):
-                        paths_around += 1
-                if paths_around >= 2:
-                    self.grid[y, x] = Cell.PATH
+        # Add some random connections to make the maze more interesting:
+        # a wall only opens up if it joins at least two open cells
+        positions = [(self.rng.randrange(2, self.size-2), self.rng.randrange(2, self.size-2))
+                     for _ in range(self.level)]
+        if positions:
+            xs, ys = np.array(positions).T
+            counts = self.get_neighbor_counts()
+            connect = (self.grid[ys, xs] == Cell.WALL) & (counts[ys, xs] >= 2)
+            self.grid[ys[connect], xs[connect]] = Cell.PATH
+            self.neighbor_counts = None
 
     def place_collectibles(self):
-        # Place coins and power-ups
-        empty_cells = []
-        for y in range(GRID_SIZE):
-            for x in range(GRID_SIZE):
-                if self.grid[y, x] == Cell.PATH:
-                    empty_cells.append((x, y))
+        # Place coins and power-ups on distinct PATH cells, sampled without
+        # replacement straight from the flat indices of the candidates
+        self.collectibles = {}
+        empty_cells = np.flatnonzero(self.grid == Cell.PATH)
         
         # Place more coins for higher levels
         num_coins = min(len(empty_cells) // 4, 5 + self.level)
         num_powerups = min(len(empty_cells) // 8, 2 + self.level // 3)
         
-        if empty_cells:
-            # Place coins
-            for _ in range(num_coins):
-                if empty_cells:
-                    pos = random.choice(empty_cells)
-                    empty_cells.remove(pos)
-                    self.grid[pos[1], pos[0]] = Cell.COIN
-            
-            # Place power-ups
-            for _ in range(num_powerups):
-                if empty_cells:
-                    pos = random.choice(empty_cells)
-                    empty_cells.remove(pos)
-                    self.grid[pos[1], pos[0]] = Cell.POWER_UP
+        picks = self.rng.sample(range(len(empty_cells)), num_coins + num_powerups)
+        chosen = empty_cells[picks].tolist()
+        for i, index in enumerate(chosen):
+            y, x = divmod(index, self.size)
+            cell_type = Cell.COIN if i < num_coins else Cell.POWER_UP
+            self.grid[y, x] = cell_type
+            self.collectibles[(x, y)] = cell_type
+
+    def index_collectibles(self):
+        # Rebuild the item index from a grid that was generated elsewhere
+        self.collectibles = {}
+        for cell_type in (Cell.COIN, Cell.POWER_UP):
+            for y, x in np.argwhere(self.grid == cell_type).tolist():
+                self.collectibles[(x, y)] = cell_type
+
+    def get_neighbor_counts(self):
+        # Open orthogonal neighbours of every cell: on open cells 1 is a dead
+        # end, 2 a corridor and 3 or more a junction
+        if self.neighbor_counts is None:
+            open_cells = np.pad(self.grid != Cell.WALL, 1).astype(np.uint8)
+            self.neighbor_counts = (open_cells[:-2, 1:-1] + open_cells[2:, 1:-1] +
+                                    open_cells[1:-1, :-2] + open_cells[1:-1, 2:])
+        return self.neighbor_counts
+
+    def is_junction(self, x, y):
+        return self.is_valid_move(x, y) and self.get_neighbor_counts()[y, x] >= 3
+
+    def get_pathfinder(self):
+        # Walls only change during generation, so the bitmap is built once
+        if self.pathfinder is None:
+            self.pathfinder = PathFinder(self.grid)
+        return self.pathfinder
+
+    def get_exit_distances(self):
+        # BFS from the exit, computed once per maze
+        if self.exit_distances is None:
+            self.exit_distances = self.get_pathfinder().distance_field([self.exit_pos])
+        return self.exit_distances
+
+    def get_loop_cells(self):
+        # Which cells lie on loops, for telling when a repaired path is exact
+        if self.loop_cells is None:
+            self.loop_cells = self.get_pathfinder().loop_cells()
+        return self.loop_cells
+
+    def get_start_distances(self):
+        # BFS from the start, where enemies are spawned away from the player
+        if self.start_distances is None:
+            self.start_distances = self.get_pathfinder().distance_field([self.start_pos])
+        return self.start_distances
+
+    def get_exit_route(self):
+        # Shortest route from the start to the exit as a list, a set and a
+        # mask, plus every cell's BFS distance to the nearest route cell.
+        # All of it depends only on the walls, so it is built once per maze.
+        if self.exit_route is None:
+            pathfinder = self.get_pathfinder()
+            route = []
+            if self.exit_pos is not None and self.start_pos is not None:
+                route = pathfinder.trace(self.get_exit_distances(), self.start_pos)
+            xs, ys = zip(*route) if route else ((), ())
+            self.set_exit_route(route, xs, ys, pathfinder.distance_field(route))
+        return self.exit_route
+
+    def set_exit_route(self, route, xs, ys, route_distances):
+        self.exit_route = route
+        self.exit_route_cells = set(route)
+        self.exit_route_mask = np.zeros((self.size, self.size), dtype=bool)
+        self.exit_route_mask[np.asarray(ys, dtype=np.intp), np.asarray(xs, dtype=np.intp)] = True
+        self.route_distances = route_distances
+
+    def export_fields(self):
+        """The grid plus the fields level setup and the planners need, as arrays"""
+        route = self.get_exit_route()
+        return {
+            'grid': self.grid,
+            'exit_distances': np.array(self.exit_distances, dtype=np.intc),
+            'start_distances': np.array(self.get_start_distances(), dtype=np.intc),
+            'loop_cells': np.frombuffer(self.get_loop_cells(), dtype=np.uint8),
+            'exit_route': np.array(route, dtype=np.intc).reshape(-1, 2),
+            'route_distances': np.array(self.route_distances, dtype=np.intc),
+        }
+
+    def import_fields(self, fields):
+        # Take fields export_fields() built elsewhere instead of building
+        # them again; distance fields come back as flat int arrays, which
+        # index just like the lists distance_field() returns
+        self.exit_distances = array('i', fields['exit_distances'].tobytes())
+        self.start_distances = array('i', fields['start_distances'].tobytes())
+        self.loop_cells = bytearray(fields['loop_cells'].tobytes())
+        xs, ys = fields['exit_route'].T
+        route = list(zip(xs.tolist(), ys.tolist()))
+        self.set_exit_route(route, xs, ys, array('i', fields['route_distances'].tobytes()))
+
+    def get_route_distance(self, pos):
+        # Steps from pos to the nearest cell of the exit route, -1 if unreachable
+        self.get_exit_route()
+        return self.route_distances[self.get_pathfinder().to_index(pos)]
+
+    def get_player_distances(self, player_pos):
+        # BFS from the player, only redone once the player is in a new cell
+        player_cell = tuple(player_pos)
+        if self.player_distances is None or player_cell != self.player_cell:
+            if player_cell == self.start_pos:
+                self.player_distances = self.get_start_distances()
+            else:
+                self.player_distances = self.get_pathfinder().distance_field([player_cell])
+            self.player_cell = player_cell
+        return self.player_distances
 
     def is_valid_move(self, x, y):
-        if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+        if not (0 <= x < self.size and 0 <= y < self.size):
             return False
         return self.grid[y, x] != Cell.WALL
 
     def get_cell(self, x, y):
-        if 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE:
+        if 0 <= x < self.size and 0 <= y < self.size:
             return self.grid[y, x]
         return Cell.WALL
 
     def collect_item(self, x, y):
-        # Add bounds checking
-        if not (0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE):
+        # Only cells in the item index can hold anything to collect
+        cell_type = self.collectibles.pop((x, y), None)
+        if cell_type is None:
             return None
-            
-        if self.grid[y, x] == Cell.COIN:
-            self.grid[y, x] = Cell.PATH
+
+        self.grid[y, x] = Cell.PATH
+        self.dirty_cells.append((x, y))
+        if cell_type == Cell.COIN:
             return 'coin'
-        elif self.grid[y, x] == Cell.POWER_UP:
-            self.grid[y, x] = Cell.PATH
-            return 'power_up'
-        return None 
\ No newline at end of file
+        return 'power_up'
@@ -0,0 +1,84 @@
+import numpy as np
+from src.game.maze import Maze
+from src.utils.constants import *
+
+class PackedMaze(Maze):
+    """Maze that keeps its walls as a bitset and its items in a dict.
+
+    Walls take one bit per cell (about 125 KB for a 1001x1001 maze), start
+    and exit are single positions and coins and power-ups live only in
+    the collectibles index. get_cell, is_valid_move and collect_item work
+    like Maze; grid is rebuilt on demand for code that wants a full array.
+    """
+    def __init__(self, level, size=GRID_SIZE, grid=None, seed=None):
+        # Generation works on a dense grid, which is dropped once packed
+        self.dense = None
+        self.wall_bits = None
+        super().__init__(level, size, grid, seed)
+        self.pack()
+
+    @classmethod
+    def from_maze(cls, maze):
+        return cls(maze.level, grid=maze.grid, seed=maze.seed)
+
+    @property
+    def grid(self):
+        if self.dense is not None:
+            return self.dense
+        return self.unpack()
+
+    @grid.setter
+    def grid(self, grid):
+        self.dense = grid
+
+    def pack(self):
+        grid = self.dense
+        self.row_bytes = (self.size + 7) // 8
+        self.wall_bits = bytearray(np.packbits(grid == Cell.WALL, axis=1).tobytes())
+        starts = np.argwhere(grid == Cell.START)
+        self.start_pos = (int(starts[0][1]), int(starts[0][0])) if len(starts) else None
+        self.dense = None
+
+    def unpack(self):
+        # Full uint8 grid with the same cell values Maze would hold
+        bits = np.frombuffer(self.wall_bits, dtype=np.uint8).reshape(self.size, self.row_bytes)
+        walls = np.unpackbits(bits, axis=1, count=self.size).astype(bool)
+        grid = np.where(walls, Cell.WALL, Cell.PATH).astype(np.uint8)
+        for pos, cell_type in ((self.start_pos, Cell.START), (self.exit_pos, Cell.EXIT)):
+            if pos is not None:
+                grid[pos[1], pos[0]] = cell_type
+        for (x, y), cell_type in self.collectibles.items():
+            grid[y, x] = cell_type
+        return grid
+
+    def is_wall(self, x, y):
+        byte = self.wall_bits[y * self.row_bytes + (x >> 3)]
+        return (byte >> (7 - (x & 7))) & 1
+
+    def is_valid_move(self, x, y):
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False
+        return not self.is_wall(x, y)
+
+    def get_cell(self, x, y):
+        if not (0 <= x < self.size and 0 <= y < self.size) or self.is_wall(x, y):
+            return Cell.WALL
+        pos = (x, y)
+        if pos in self.collectibles:
+            return self.collectibles[pos]
+        if pos == self.exit_pos:
+            return Cell.EXIT
+        if pos == self.start_pos:
+            return Cell.START
+        return Cell.PATH
+
+    def collect_item(self, x, y):
+        # Removing the entry from the index is all there is to clear
+        cell_type = self.collectibles.pop((x, y), None)
+        if cell_type is None:
+            return None
+
+        self.dirty_cells.append((x, y))
+        if cell_type == Cell.COIN:
+            return 'coin'
+        return 'power_up'
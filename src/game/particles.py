@@ -0,0 +1,179 @@
+from src.utils.optional_pygame import pygame
+import numpy as np
+from src.utils.constants import *
+from src.utils.profiler import profiler
+
+def disc_offsets(step):
+    """Pixel offsets (dx, dy) of a disc in a (step + 1)-pixel square
+
+    The radius is the size (step + 1) / 2 rounded down, and a pixel is
+    filled when its centre is within sqrt(radius ** 2 - radius + 1/2) of
+    the disc's centre. Up to PARTICLE_MAX_SIZE that is pixel for pixel
+    what pygame.draw.circle fills.
+    """
+    radius = (step + 1) // 2
+    if not radius:
+        return (np.zeros(0, dtype=np.int32),) * 2
+    # Twice the offset of each pixel centre from the disc's centre
+    twice = 2 * np.arange(step + 1) + 1 - 2 * radius
+    inside = twice[:, None] ** 2 + twice[None, :] ** 2 <= 4 * radius * radius - 4 * radius + 2
+    return tuple(axis.astype(np.int32) for axis in np.nonzero(inside))
+
+class ParticleSystem:
+    """Fixed-capacity particles kept as NumPy arrays (struct of arrays).
+
+    Dead slots go on a free-list and are reused by emit(). update() moves
+    and ages every particle at once, and draw() adds up the discs of each
+    colour into an alpha layer and blits it once. Positions and velocities
+    are in cells.
+
+    Drawing costs about one NumPy pass per covered pixel: 30,000 particles
+    take 21-25 ms on a single slow core, so 60 FPS holds up to about
+    15,000 on screen.
+    """
+    def __init__(self, capacity=MAX_PARTICLES):
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.dx = np.zeros(capacity)
+        self.dy = np.zeros(capacity)
+        self.age = np.zeros(capacity)
+        self.fade_speed = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        self.alpha = np.zeros(capacity, dtype=np.uint8)
+        self.color = np.zeros(capacity, dtype=np.uint8)  # index into palette
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.palette = []
+        self.free = list(range(capacity - 1, -1, -1))
+        self.count = 0
+
+        # Sizes snap to half pixels; one disc mask per size
+        self.size_steps = int(PARTICLE_MAX_SIZE * 2)
+        self.stamps = [disc_offsets(step) for step in range(self.size_steps)]
+        self.layers = {}  # palette index -> alpha surface discs are splatted into
+
+    def clear(self):
+        self.alive[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+        self.count = 0
+
+    def emit(self, x, y, amount, color, size_range, alpha_range, seed):
+        """Spawn up to amount particles at (x, y); extras are dropped when full"""
+        amount = min(amount, len(self.free))
+        if amount <= 0:
+            return
+        slots = self.free[-amount:]
+        del self.free[-amount:]
+
+        if color not in self.palette:
+            self.palette.append(color)
+        rng = np.random.default_rng(seed)
+        self.x[slots] = x
+        self.y[slots] = y
+        self.dx[slots] = rng.uniform(-1, 1, amount) * PARTICLE_SPEED
+        self.dy[slots] = rng.uniform(-1, 1, amount) * PARTICLE_SPEED
+        self.age[slots] = 0
+        self.fade_speed[slots] = rng.uniform(0.5, 1.5, amount)
+        self.size[slots] = rng.uniform(*size_range, amount)
+        self.alpha[slots] = rng.integers(alpha_range[0], alpha_range[1] + 1, amount)
+        self.color[slots] = self.palette.index(color)
+        self.alive[slots] = True
+        self.count += amount
+
+    def update(self, dt):
+        if not self.count:
+            return
+        alive = self.alive
+        self.age[alive] += dt * self.fade_speed[alive]
+        self.x[alive] += self.dx[alive] * dt
+        self.y[alive] += self.dy[alive] * dt
+
+        # Particles live for one unit of age
+        expired = np.flatnonzero(alive & (self.age >= 1.0))
+        if len(expired):
+            alive[expired] = False
+            self.free.extend(expired.tolist())
+            self.count -= len(expired)
+
+    def draw(self, surface, cell_size, offset, area):
+        """Blit every live particle inside area; returns the rect drawn over, or None"""
+        if not self.count:
+            return None
+        live = np.flatnonzero(self.alive)
+
+        # Sizes snap to half pixels and alpha to PARTICLE_ALPHA_STEP levels,
+        # fading out over the particle's life
+        step = np.clip(np.round(self.size[live] * 2), 1, self.size_steps).astype(np.int32) - 1
+        radius = (step + 1) // 2
+        fade = (255 * (1 - self.age[live])).astype(np.int32)
+        level = np.minimum(self.alpha[live], fade) // PARTICLE_ALPHA_STEP
+        left = offset[0] + (self.x[live] * cell_size).astype(np.int32) - radius
+        top = offset[1] + (self.y[live] * cell_size).astype(np.int32) - radius
+
+        # Cull anything outside the area, and fully faded discs
+        width = step + 1
+        shown = ((level > 0) & (left + width > area.left) & (left < area.right) &
+                 (top + width > area.top) & (top < area.bottom))
+        if not shown.any():
+            return None
+        left, top, width, step = left[shown], top[shown], width[shown], step[shown]
+        opacity = level[shown] * PARTICLE_ALPHA_STEP / 255
+        palette = self.color[live][shown]
+
+        # One layer per colour; within a colour the discs are splatted at once
+        drawn = None
+        for color in np.unique(palette).tolist():
+            picked = np.flatnonzero(palette == color)
+            bounds = self.splat(surface, color, left[picked], top[picked],
+                                width[picked], step[picked], opacity[picked], area)
+            if bounds is not None:
+                drawn = bounds if drawn is None else drawn.union(bounds)
+        profiler.count('particles.drawn', len(left))
+        return drawn
+
+    def splat(self, surface, color, left, top, width, step, opacity, area):
+        """Draw discs of one palette colour through a single alpha layer blit"""
+        # Discs stacked with opacities a1, a2, ... cover 1 - prod(1 - ai), the
+        # same as blitting them one after another; summing -log(1 - ai) per
+        # pixel with bincount gets that product for every pixel at once
+        x0 = int(left.min())
+        y0 = int(top.min())
+        w = int((left + width).max()) - x0
+        h = int((top + width).max()) - y0
+        pixels = []
+        weights = []
+        for size in np.unique(step).tolist():
+            dx, dy = self.stamps[size]
+            if not len(dx):
+                continue
+            picked = np.flatnonzero(step == size)
+            base = (top[picked] - y0) * w + (left[picked] - x0)
+            pixels.append((base[:, None] + (dy * w + dx)).ravel())
+            weights.append(np.repeat(-np.log1p(-opacity[picked]), len(dx)))
+        if not pixels:
+            return None
+        cover = np.bincount(np.concatenate(pixels), np.concatenate(weights),
+                            minlength=w * h).reshape(h, w)
+
+        # Only the part inside the area is drawn
+        bounds = pygame.Rect(x0, y0, w, h).clip(area)
+        if not bounds.width or not bounds.height:
+            return None
+        cover = cover[bounds.y - y0:bounds.bottom - y0, bounds.x - x0:bounds.right - x0]
+        layer = self.layer_for(color, area.size)
+
+        # surfarray views are indexed [x, y]
+        view = pygame.surfarray.pixels_alpha(layer)
+        view[:bounds.width, :bounds.height] = (-255 * np.expm1(-cover.astype(np.float32))).T
+        del view
+        surface.blit(layer, bounds, pygame.Rect((0, 0), bounds.size))
+        return bounds
+
+    def layer_for(self, color, size):
+        """Surface filled with a palette colour whose alpha the discs are written into"""
+        layer = self.layers.get(color)
+        if layer is None or layer.get_size() != size:
+            layer = self.layers[color] = pygame.Surface(size, pygame.SRCALPHA)
+            layer.fill((*self.palette[color], 0))
+            profiler.count('surfaces.allocated')
+        return layer
@@ -0,0 +1,408 @@
+import heapq
+from array import array
+from collections import deque
+import numpy as np
+from src.utils.constants import *
+from src.utils.profiler import profiler
+
+# Neighbour order used by every search unless the caller reorders it
+DIRECTIONS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+UNSEEN = 2 ** 31 - 1  # g score of cells no search has reached
+
+class PathFinder:
+    """Grid searches over a flat, wall-padded walkability bitmap
+
+    grid may be a window onto a larger world whose top-left cell is at
+    origin; positions in and out are always world positions.
+    """
+    def __init__(self, grid, origin=(0, 0)):
+        height, width = grid.shape
+        self.grid_width = width
+        self.grid_height = height
+        self.origin = origin
+
+        # One byte per cell, with a ring of walls around the maze so that
+        # neighbour lookups never need bounds checks
+        self.width = width + 2
+        padded = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = grid != Cell.WALL
+        self.walkable = bytearray(padded.tobytes())
+
+    def to_index(self, pos):
+        return (pos[1] - self.origin[1] + 1) * self.width + pos[0] - self.origin[0] + 1
+
+    def to_pos(self, index):
+        y, x = divmod(index, self.width)
+        return (x - 1 + self.origin[0], y - 1 + self.origin[1])
+
+    def offset(self, direction):
+        return direction[1] * self.width + direction[0]
+
+    def is_walkable(self, pos):
+        x = pos[0] - self.origin[0]
+        y = pos[1] - self.origin[1]
+        if not (0 <= x < self.grid_width and 0 <= y < self.grid_height):
+            return False
+        return bool(self.walkable[self.to_index(pos)])
+
+    def distance_field(self, sources):
+        """Breadth-first step counts from the nearest source to every cell
+
+        Indexed like the bitmap; unreachable cells and walls hold -1.
+        """
+        walkable = self.walkable
+        distances = [-1] * len(walkable)
+        frontier = []
+        for pos in sources:
+            index = self.to_index(pos)
+            if walkable[index] and distances[index] < 0:
+                distances[index] = 0
+                frontier.append(index)
+
+        offsets = [self.offset(direction) for direction in DIRECTIONS]
+        step = 0
+        while frontier:
+            step += 1
+            next_frontier = []
+            for cell in frontier:
+                for offset in offsets:
+                    neighbor = cell + offset
+                    if walkable[neighbor] and distances[neighbor] < 0:
+                        distances[neighbor] = step
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+            profiler.count('bfs.expanded', len(frontier))
+
+        return distances
+
+    def loop_cells(self):
+        """Flags of the cells on a loop, or on a corridor between loops
+
+        Indexed like the bitmap. It is what is left once dead ends have been
+        peeled away a cell at a time, so a step with either cell outside it
+        is a bridge: the only way between the two sides.
+        """
+        walkable = self.walkable
+        cells = np.frombuffer(walkable, dtype=np.uint8).reshape(-1, self.width)
+        degree = np.zeros_like(cells)
+        degree[1:-1, 1:-1] = (cells[:-2, 1:-1] + cells[2:, 1:-1] +
+                              cells[1:-1, :-2] + cells[1:-1, 2:]) * cells[1:-1, 1:-1]
+        stack = np.flatnonzero(cells.ravel() & (degree.ravel() <= 1)).tolist()
+        degree = bytearray(degree.tobytes())
+        inside = bytearray(walkable)
+        offsets = [self.offset(direction) for direction in DIRECTIONS]
+        while stack:
+            cell = stack.pop()
+            if not inside[cell]:
+                continue
+            inside[cell] = 0
+            for offset in offsets:
+                neighbor = cell + offset
+                if inside[neighbor]:
+                    degree[neighbor] -= 1
+                    if degree[neighbor] == 1:
+                        stack.append(neighbor)
+        return inside
+
+    def descend(self, distances, pos, directions=DIRECTIONS):
+        """Neighbour of pos one step closer to the field's source, or None"""
+        index = self.to_index(pos)
+        current = distances[index]
+        if current <= 0:
+            return None
+
+        for direction in directions:
+            if distances[index + self.offset(direction)] == current - 1:
+                return (pos[0] + direction[0], pos[1] + direction[1])
+        return None
+
+    def trace(self, distances, pos):
+        """Shortest path from pos down to the field's source, or [] if unreachable"""
+        if distances[self.to_index(pos)] < 0:
+            return []
+
+        path = [pos]
+        next_pos = self.descend(distances, pos)
+        while next_pos:
+            path.append(next_pos)
+            next_pos = self.descend(distances, next_pos)
+        return path
+
+class PathSearch:
+    """A* that can be run a slice at a time.
+
+    run() does at most budget units of work and the next call carries on
+    where it stopped, so one long search can be spread over many ticks.
+    Expanding a node is a unit, and so is walking one cell back from the
+    goal once it is reached; a path across a big maze is long enough for
+    that walk to matter. The search reads the PathFinder's bitmap, which
+    is its own copy of the walls taken when the maze was built.
+
+    When done, path holds the cells from start to goal (or [] if there is
+    no way through) and index maps each of them to its position, counted
+    so that the goal is 0 and the start is 1 - len(path).
+    """
+    def __init__(self, pathfinder, start_pos, goal_pos, directions=DIRECTIONS):
+        self.pathfinder = pathfinder
+        self.start_pos = start_pos
+        self.goal_pos = goal_pos
+        # Nodes with equal f expand in the order they were queued, so ties
+        # between equally short paths go to the earlier direction
+        self.steps = [pathfinder.offset(direction) for direction in directions]
+
+        # Flat arrays rather than dicts: they never need rehashing as the
+        # search grows, which would stall a single slice
+        cells = len(pathfinder.walkable)
+        start = pathfinder.to_index(start_pos)
+        self.goal = pathfinder.to_index(goal_pos)
+        self.g_score = array('i', [UNSEEN]) * cells
+        self.g_score[start] = 0
+        self.came_from = array('i', [-1]) * cells
+        self.closed = bytearray(cells)
+        h = abs(start_pos[0] - goal_pos[0]) + abs(start_pos[1] - goal_pos[1])
+        self.open_heap = [(h, 0, start)]
+        self.counter = 1
+        self.reached = None  # next cell to walk back from once the goal is found
+        self.reversed_path = []
+        self.index = {}
+        self.done = False
+        self.path = []
+
+    def run(self, budget=None):
+        """Work for up to budget units (no limit if None); returns the units used"""
+        walkable = self.pathfinder.walkable
+        width = self.pathfinder.width
+        steps = self.steps
+        goal = self.goal
+        # The heuristic works on bitmap coordinates
+        goal_x = self.goal_pos[0] - self.pathfinder.origin[0]
+        goal_y = self.goal_pos[1] - self.pathfinder.origin[1]
+        g_score = self.g_score
+        came_from = self.came_from
+        closed = self.closed
+        open_heap = self.open_heap
+        counter = self.counter
+        expanded = 0
+        push = heapq.heappush
+        pop = heapq.heappop
+
+        while self.reached is None and open_heap and (budget is None or expanded < budget):
+            _, _, current = pop(open_heap)
+            if closed[current]:
+                continue
+
+            expanded += 1
+            if current == goal:
+                self.reached = current
+                break
+
+            closed[current] = 1
+            current_g = g_score[current]
+
+            for step in steps:
+                neighbor = current + step
+                if closed[neighbor] or not walkable[neighbor]:
+                    continue
+
+                tentative_g_score = current_g + 1
+                if tentative_g_score >= g_score[neighbor]:
+                    continue
+
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_g_score
+                y, x = divmod(neighbor, width)
+                h = abs(x - 1 - goal_x) + abs(y - 1 - goal_y)
+                push(open_heap, (tentative_g_score + h, counter, neighbor))
+                counter += 1
+        self.counter = counter
+        profiler.count('astar.expanded', expanded)
+
+        if self.reached is None:
+            if not open_heap:
+                self.done = True  # unreachable; path stays []
+            return expanded
+
+        # Walk back from the goal, numbering cells as we go
+        to_pos = self.pathfinder.to_pos
+        reversed_path = self.reversed_path
+        index = self.index
+        current = self.reached
+        while current >= 0 and (budget is None or expanded < budget):
+            pos = to_pos(current)
+            index[pos] = -len(reversed_path)
+            reversed_path.append(pos)
+            current = came_from[current]
+            expanded += 1
+        self.reached = current
+        if current < 0:
+            self.path = reversed_path[::-1]
+            self.done = True
+        return expanded
+
+class PlanningScheduler:
+    """Runs queued PathSearches within a fixed node budget per tick.
+
+    Searches take turns: each one in the queue gets an equal share of
+    what is left of the budget, and unfinished ones wait at the back for
+    the next tick. The budget is counted in expanded nodes rather than
+    milliseconds so a seeded session plans, and replays, identically on
+    any machine.
+    """
+    def __init__(self, budget=PLANNER_NODE_BUDGET):
+        self.budget = budget
+        self.queue = deque()
+
+    def submit(self, search):
+        self.queue.append(search)
+
+    def clear(self):
+        self.queue.clear()
+
+    def run(self):
+        queue = self.queue
+        if not queue:
+            return
+        remaining = self.budget
+        while queue and remaining > 0:
+            share = max(1, remaining // len(queue))
+            search = queue.popleft()
+            remaining -= search.run(share)
+            if not search.done:
+                queue.append(search)
+        profiler.count('planner.pending', len(queue))
+
+class PathRepairPlanner:
+    """Keeps a shortest path, or close to one, between a moving start and goal.
+
+    The owner reports every cell the goal enters through move_goal(), and
+    asks for the start's next step through next_step(). In between fresh
+    A* searches the path is repaired in place: the start walking along it
+    trims the front, the goal stepping back along it trims the back, and
+    the goal stepping off its end extends it, cutting across to the
+    earliest path cell the new goal touches.
+
+    Trimming never makes the path longer than the shortest. Extending is
+    exact when the step crosses a bridge, an edge with a cell outside
+    loop_cells, since then every way to the goal comes through it. Any
+    other extension may be two steps longer than the shortest, as the goal
+    might be closer the other way round a loop. Once those steps could add
+    up to more than slack, or the goal jumps, a fresh A* runs.
+
+    With a scheduler the fresh A* runs in the background over later ticks
+    while the start keeps following the old path; goal moves made in the
+    meantime are replayed onto the new path when it arrives. Without one
+    it runs there and then.
+    """
+    def __init__(self, pathfinder, loop_cells=None, slack=PLANNER_SLACK, scheduler=None):
+        self.pathfinder = pathfinder
+        self.loop_cells = loop_cells  # PathFinder.loop_cells(), or None if unknown
+        self.slack = slack
+        self.scheduler = scheduler
+        self.path = deque()
+        self.index = {}  # cell -> position in the path; path[0] is at first
+        self.first = 0  # position of path[0]
+        self.excess = 0  # steps the path may be longer than the shortest
+        self.goal = None
+        self.search = None  # PathSearch still being run by the scheduler
+        self.goal_moves = []  # goal cells entered while the search runs
+
+    def move_goal(self, goal):
+        """The goal entered a new cell; call on every cell it enters"""
+        if goal == self.goal:
+            return
+        self.goal = goal
+        if self.search is not None:
+            self.goal_moves.append(goal)
+        elif self.path and self.path[-1] != goal:
+            # If this fails the path ends short of the goal, so the next
+            # step plans afresh
+            self.repair_goal(goal)
+
+    def next_step(self, start, goal, directions=DIRECTIONS):
+        """Cell after start on the path to goal, or None"""
+        if start == goal:
+            return None
+        if self.search is not None and self.search.done:
+            self.adopt(self.search)
+        self.move_goal(goal)
+
+        if self.path and self.path[-1] == goal and self.excess <= self.slack and self.advance(start):
+            profiler.count('planner.repairs')
+        elif self.scheduler is None:
+            search = PathSearch(self.pathfinder, start, goal, directions)
+            search.run()
+            self.adopt(search)
+        else:
+            if self.search is None:
+                self.search = PathSearch(self.pathfinder, start, goal, directions)
+                self.scheduler.submit(self.search)
+            # Keep going along the old path until the new one is ready
+            if not self.advance(start):
+                return None
+        if len(self.path) < 2:
+            return None
+        return self.path[1]
+
+    def adopt(self, search):
+        # Take over a finished search's path and numbering as they are, then
+        # catch up with wherever the goal went while it ran
+        self.path = deque(search.path)
+        self.index = search.index
+        self.first = 1 - len(search.path)
+        self.excess = 0
+        self.search = None
+        moves, self.goal_moves = self.goal_moves, []
+        for goal in moves:
+            if not self.path or not self.repair_goal(goal):
+                break
+        profiler.count('planner.replans')
+
+    def advance(self, start):
+        # The start moved along the path: drop the cells behind it
+        path = self.path
+        index = self.index
+        position = index.get(start)
+        if position is None:
+            return False
+        while self.first < position:
+            del index[path.popleft()]
+            self.first += 1
+        return True
+
+    def repair_goal(self, goal):
+        # Move the back of the path to a goal one step from where it was
+        path = self.path
+        index = self.index
+        if goal == path[-1]:
+            return True
+
+        # The goal walked back along the path
+        position = index.get(goal)
+        if position is None:
+            # Or it stepped off the end; join it to the earliest path cell
+            # it touches, which is at worst the old end
+            last = path[-1]
+            if abs(goal[0] - last[0]) + abs(goal[1] - last[1]) != 1:
+                return False
+            if not self.pathfinder.is_walkable(goal):
+                return False
+            joined = min((neighbor for neighbor in
+                          ((goal[0] + dx, goal[1] + dy) for dx, dy in DIRECTIONS)
+                          if neighbor in index), key=index.get)
+            position = index[joined]
+            if not self.crosses_bridge(joined, goal):
+                self.excess += 2
+        while self.first + len(path) - 1 > position:
+            del index[path.pop()]
+        if path[-1] != goal:
+            path.append(goal)
+            index[goal] = self.first + len(path) - 1
+        return True
+
+    def crosses_bridge(self, a, b):
+        # Whether the step from a to b is the only way between their sides
+        loop_cells = self.loop_cells
+        if loop_cells is None:
+            return False
+        to_index = self.pathfinder.to_index
+        return not (loop_cells[to_index(a)] and loop_cells[to_index(b)])
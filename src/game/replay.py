@@ -0,0 +1,93 @@
+import struct
+import sys
+import time
+from src.game.simulation import Simulation
+from src.utils.constants import *
+
+# magic, version, seed, start level, timestep, tick count, final checksum, endless
+HEADER = struct.Struct('<4sBQHdII?')
+# Inputs are stored run-length encoded: action mask, number of ticks
+RUN = struct.Struct('<BH')
+MAGIC = b'MZRP'
+VERSION = 5
+
+class Replay:
+    """A recorded session: its seed plus one ACTION_* mask per tick"""
+    def __init__(self, seed, level=1, timestep=TIMESTEP, actions=b'', checksum=0,
+                 endless=False):
+        self.seed = seed
+        self.endless = endless
+        self.level = level
+        self.timestep = timestep
+        self.actions = bytes(actions)
+        self.checksum = checksum
+
+    @classmethod
+    def from_simulation(cls, simulation):
+        return cls(simulation.seed, simulation.start_level, simulation.timestep,
+                   simulation.recorded_actions, simulation.state_checksum(),
+                   simulation.endless)
+
+    def to_bytes(self):
+        runs = []
+        i = 0
+        while i < len(self.actions):
+            actions = self.actions[i]
+            length = 1
+            while (i + length < len(self.actions) and length < 0xFFFF and
+                   self.actions[i + length] == actions):
+                length += 1
+            runs.append(RUN.pack(actions, length))
+            i += length
+
+        header = HEADER.pack(MAGIC, VERSION, self.seed, self.level, self.timestep,
+                             len(self.actions), self.checksum, self.endless)
+        return header + b''.join(runs)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, level, timestep, ticks, checksum, endless = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a maze replay file")
+
+        actions = bytearray()
+        for offset in range(HEADER.size, len(data), RUN.size):
+            mask, length = RUN.unpack_from(data, offset)
+            actions.extend(bytes([mask]) * length)
+        if len(actions) != ticks:
+            raise ValueError("Replay file is truncated")
+        return cls(seed, level, timestep, actions, checksum, endless)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def run(self):
+        """Re-simulate the session headlessly and return the finished Simulation"""
+        simulation = Simulation(self.level, self.timestep, seed=self.seed, endless=self.endless)
+        step = simulation.step
+        for actions in self.actions:
+            step(actions)
+        return simulation
+
+def main(path):
+    replay = Replay.load(path)
+    start = time.perf_counter()
+    simulation = replay.run()
+    elapsed = time.perf_counter() - start
+
+    game_time = len(replay.actions) * replay.timestep
+    print(f"Replayed {len(replay.actions)} ticks ({game_time:.1f}s of play) in {elapsed:.2f}s")
+    print(f"Level {simulation.level}, score {simulation.score}, state {simulation.state}")
+    if simulation.state_checksum() != replay.checksum:
+        print("Desync: final state does not match the recording")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1] if len(sys.argv) > 1 else REPLAY_PATH))
@@ -0,0 +1,249 @@
+import random
+import zlib
+import numpy as np
+from src.game.maze import Maze
+from src.game.chunked_maze import ChunkedMaze
+from src.game.player import Player
+from src.game.enemy import Enemy
+from src.game.spatial_hash import SpatialHash
+from src.game.pathfinding import PlanningScheduler
+from src.utils.constants import *
+from src.utils.profiler import profiler
+
+class Simulation:
+    """Game rules for Maze, Player and Enemy with no display, sound or input.
+
+    Game builds on this for the real window. On its own it can be stepped
+    as fast as the CPU allows, e.g. for bots and difficulty regressions.
+    A session is fully determined by its seed and the actions given to
+    step(), which are recorded so it can be replayed (see replay.py).
+
+    With endless set the maze is a ChunkedMaze with no exit: chunks are
+    streamed in around the player, and enemies left behind outside the
+    loaded area are brought back near the player.
+    """
+    def __init__(self, level=1, timestep=TIMESTEP, level_pipeline=None, seed=None,
+                 particles=None, endless=False):
+        self.level = level
+        self.endless = endless
+        self.start_level = level
+        self.level_pipeline = level_pipeline
+        # Enemy effects go here when something draws them
+        self.particles = particles
+        # Enemy path searches share a per-tick budget instead of stalling a tick
+        self.planning = PlanningScheduler()
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        # Visual effects draw from their own stream so they never shift mazes
+        self.effects_rng = random.Random(f"{self.seed}:effects")
+        self.attempts = {}  # level -> how many times it has been started
+        self.recorded_actions = bytearray()
+        self.score = 0
+        self.high_score = 0
+        self.timestep = timestep
+        self.ticks = 0
+        self.state = MENU
+        self.countdown = COUNTDOWN_DURATION
+        self.immunity = IMMUNITY_DURATION
+        self.reset_game()
+
+    def maze_seed(self, level):
+        # Depends only on the session seed, the level and the attempt number
+        attempt = self.attempts.get(level, 0)
+        return random.Random(f"{self.seed}:{level}:{attempt}").getrandbits(32)
+
+    def create_maze(self):
+        seed = self.maze_seed(self.level)
+        self.attempts[self.level] = self.attempts.get(self.level, 0) + 1
+        if self.endless:
+            maze = ChunkedMaze(seed, self.level)
+            maze.follow(maze.start_pos)
+            return maze
+
+        # Use a pre-generated maze when one is ready, otherwise build it now
+        maze = None
+        if self.level_pipeline:
+            maze = self.level_pipeline.take(self.level, seed)
+            upcoming = range(self.level, self.level + self.level_pipeline.lookahead)
+            self.level_pipeline.prefetch([(level, self.maze_seed(level)) for level in upcoming])
+        if maze is None:
+            maze = Maze(self.level, seed=seed)
+        return maze
+
+    def reset_game(self):
+        self.maze = self.create_maze()
+        self.player = Player()
+        self.spawn_enemies()
+        self.score = 0
+        self.state = PLAYING
+        self.countdown = COUNTDOWN_DURATION
+        self.immunity = IMMUNITY_DURATION
+
+    def spawn_enemies(self, count=None):
+        # More enemies on higher levels, as many as the maze has room for.
+        # They all step down the maze's shared distance field to the player,
+        # so each one costs a lookup per move.
+        if count is None:
+            open_cells = self.maze.get_pathfinder().walkable.count(1)
+            count = min(MAX_ENEMIES, max(1, open_cells // OPEN_CELLS_PER_ENEMY),
+                        1 + (self.level - 1) // LEVELS_PER_EXTRA_ENEMY)
+
+        # The first enemy starts on the start cell; the rest start on random
+        # cells away from it, drawn from a stream tied to the maze seed
+        spawns = [(1, 1)]
+        if count > 1:
+            rng = random.Random(f"{self.maze.seed}:enemies")
+            spawns.extend(self.far_cells(self.maze.get_start_distances(), count - 1, rng))
+
+        # Searches still queued for the last maze are of no use now
+        self.planning.clear()
+        self.enemies = [Enemy(self.level, rng=self.effects_rng, spawn=spawn,
+                              particles=self.particles, scheduler=self.planning)
+                        for spawn in spawns]
+
+        # Player and enemies filed by cell, for collisions and culling
+        self.entity_index = SpatialHash()
+        for entity in [self.player] + self.enemies:
+            self.entity_index.insert(entity)
+
+        # Enemies check the exit route as they move, and on big mazes their
+        # planners check for loops; build both now rather than in the middle
+        # of the first tick that asks. An endless maze has neither.
+        if not self.endless:
+            self.maze.get_exit_route()
+            if self.maze.size >= INCREMENTAL_PLANNER_MIN_SIZE:
+                self.maze.get_loop_cells()
+
+    def far_cells(self, distances, count, rng):
+        # Up to count open cells at least ENEMY_SPAWN_DISTANCE steps away by
+        # the distance field; a pipeline maze comes with the start's field
+        pathfinder = self.maze.get_pathfinder()
+        candidates = np.flatnonzero(np.asarray(distances) >= ENEMY_SPAWN_DISTANCE)
+        picks = rng.sample(range(len(candidates)), min(count, len(candidates)))
+        return [pathfinder.to_pos(int(candidates[i])) for i in picks]
+
+    def bring_back_enemies(self):
+        # Endless mode: enemies the loaded area has left behind can't plan,
+        # so they rejoin on cells away from the player
+        stray = [enemy for enemy in self.enemies
+                 if not self.maze.in_window(int(enemy.x), int(enemy.y))]
+        if not stray:
+            return
+        rng = random.Random(f"{self.maze.seed}:enemies:{self.ticks}")
+        distances = self.maze.get_player_distances(self.entity_index.cells[self.player])
+        for enemy, spawn in zip(stray, self.far_cells(distances, len(stray), rng)):
+            enemy.spawn = spawn
+            enemy.reset()
+            enemy.update_speed()
+            self.entity_index.move(enemy)
+
+    def play_sound(self, name):
+        # No audio without a mixer; Game plays the real sounds
+        pass
+
+    def save_high_score(self):
+        pass
+
+    def apply_actions(self, actions):
+        # One tick of input as an ACTION_* bitmask
+        if self.state == MENU:
+            # Start game
+            if actions & ACTION_START:
+                self.state = PLAYING
+
+        elif self.state == PLAYING:
+            dx = bool(actions & ACTION_RIGHT) - bool(actions & ACTION_LEFT)
+            dy = bool(actions & ACTION_DOWN) - bool(actions & ACTION_UP)
+
+            # Only move if one direction is pressed at a time, and only once
+            # the player has arrived in its cell
+            if not self.player.current_direction:
+                if dx != 0 and dy == 0:
+                    self.player.move(dx, 0, self.maze)
+                elif dy != 0 and dx == 0:
+                    self.player.move(0, dy, self.maze)
+
+            # Pause game
+            if actions & ACTION_PAUSE:
+                self.state = PAUSED
+
+        elif self.state == PAUSED:
+            # Resume game
+            if actions & ACTION_PAUSE:
+                self.state = PLAYING
+            # Restart game
+            elif actions & ACTION_RESTART:
+                self.reset_game()
+
+        elif self.state == GAME_OVER:
+            # Restart game
+            if actions & ACTION_RESTART:
+                self.level = 1
+                self.score = 0
+                self.reset_game()
+
+    def step(self, actions=0):
+        """Apply one tick of input and advance the game by one fixed timestep"""
+        self.recorded_actions.append(actions)
+        self.apply_actions(actions)
+        self.update(self.timestep)
+        self.ticks += 1
+        return self.state
+
+    def state_checksum(self):
+        # Cheap fingerprint for spotting replay desyncs
+        snapshot = (self.ticks, self.level, self.score, self.state,
+                    self.player.get_position(),
+                    [enemy.get_position() for enemy in self.enemies])
+        return zlib.crc32(repr(snapshot).encode())
+
+    @profiler.timed('update')
+    def update(self, dt):
+        if self.state != PLAYING:
+            return
+
+        # Update countdown and immunity
+        if self.countdown > 0:
+            self.countdown -= dt
+            return
+
+        if self.immunity > 0:
+            self.immunity -= dt
+
+        # Spend this tick's search budget, then update player and enemies
+        self.planning.run()
+        self.player.update(dt)
+        self.entity_index.move(self.player)
+        if self.endless and self.maze.follow(self.entity_index.cells[self.player]):
+            self.bring_back_enemies()
+        for enemy in self.enemies:
+            enemy.update(dt, self.maze, self.player)
+            self.entity_index.move(enemy)
+
+        # Check collisions
+        player_pos = self.entity_index.cells[self.player]
+
+        # Check enemy collision: anyone else sharing the player's cell
+        if (self.immunity <= 0 and
+            len(self.entity_index.at(*player_pos)) > 1 and
+            not self.player.power_up_active):
+            self.state = GAME_OVER
+            if self.score > self.high_score:
+                self.high_score = self.score
+                self.save_high_score()
+            self.play_sound('game_over')
+
+        # Check item collection
+        item = self.maze.collect_item(*player_pos)
+        if item == 'coin':
+            self.score += 10
+            self.play_sound('coin')
+        elif item == 'power_up':
+            self.player.activate_power_up(POWER_UP_DURATION)
+            self.play_sound('powerup')
+
+        # Check level completion
+        if self.maze.get_cell(*player_pos) == Cell.EXIT:
+            self.level += 1
+            self.score += 50
+            self.play_sound('level_complete')
+            self.reset_game()
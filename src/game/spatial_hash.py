@@ -0,0 +1,57 @@
+class SpatialHash:
+    """Entities bucketed by the maze cell they are in.
+
+    move() is called whenever an entity may have moved and only touches the
+    buckets once its cell actually changes. Queries cost the number of
+    cells they cover (or of occupied cells, if fewer), not the number of
+    entities.
+    """
+    def __init__(self):
+        self.buckets = {}  # (x, y) -> entities in that cell
+        self.cells = {}  # entity -> cell it is filed under
+
+    def insert(self, entity):
+        cell = (int(entity.x), int(entity.y))
+        self.cells[entity] = cell
+        self.buckets.setdefault(cell, []).append(entity)
+
+    def remove(self, entity):
+        cell = self.cells.pop(entity)
+        bucket = self.buckets[cell]
+        bucket.remove(entity)
+        if not bucket:
+            del self.buckets[cell]
+
+    def move(self, entity):
+        cell = (int(entity.x), int(entity.y))
+        if cell != self.cells[entity]:
+            self.remove(entity)
+            self.cells[entity] = cell
+            self.buckets.setdefault(cell, []).append(entity)
+
+    def at(self, x, y):
+        """Entities occupying cell (x, y)"""
+        return self.buckets.get((x, y), ())
+
+    def in_area(self, left, top, right, bottom):
+        """Entities in the cells of a rectangle; right and bottom are exclusive"""
+        found = []
+        if (right - left) * (bottom - top) > len(self.buckets):
+            for (x, y), bucket in self.buckets.items():
+                if left <= x < right and top <= y < bottom:
+                    found.extend(bucket)
+        else:
+            buckets = self.buckets
+            for y in range(top, bottom):
+                for x in range(left, right):
+                    bucket = buckets.get((x, y))
+                    if bucket:
+                        found.extend(bucket)
+        return found
+
+    def within(self, x, y, radius):
+        """Entities whose cell is at most radius cells from (x, y)"""
+        r = int(radius)
+        limit = radius * radius
+        return [entity for entity in self.in_area(x - r, y - r, x + r + 1, y + r + 1)
+                if (self.cells[entity][0] - x) ** 2 + (self.cells[entity][1] - y) ** 2 <= limit]
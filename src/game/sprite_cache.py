@@ -0,0 +1,100 @@
+import math
+from src.utils.optional_pygame import pygame
+from collections import OrderedDict
+from src.utils.constants import *
+from src.utils.profiler import profiler
+
+class SpriteCache:
+    """Pre-rendered surfaces keyed by their drawing parameters, evicted LRU"""
+    def __init__(self, max_entries=SPRITE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.scratch_surfaces = {}
+
+    def get(self, key, render):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = render()
+        profiler.count('surfaces.allocated')
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+        self.scratch_surfaces.clear()
+
+    def scratch(self, width, height):
+        # A reusable, cleared alpha surface for one-off compositing
+        surface = self.scratch_surfaces.get((width, height))
+        if surface is None:
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            profiler.count('surfaces.allocated')
+            self.scratch_surfaces[(width, height)] = surface
+        else:
+            surface.fill((0, 0, 0, 0))
+        return surface
+
+    def player_glow(self, cell_size, glow_color, glow_size):
+        def render():
+            surface = pygame.Surface((cell_size * 3, cell_size * 3), pygame.SRCALPHA)
+            center = (cell_size * 1.5, cell_size * 1.5)
+            # Outer glow
+            pygame.draw.circle(surface, glow_color, center, glow_size * 1.2)
+            # Inner glow
+            pygame.draw.circle(surface, (*PLAYER_COLOR, 150), center, glow_size * 0.8)
+            return surface
+        return self.get(('player_glow', cell_size, glow_color, glow_size), render)
+
+    def player_body(self, size, outline_color, indicator_color, rotation):
+        # Rotations are snapped so a handful of sprites cover every angle
+        rotation = round(rotation / ROTATION_STEP) * ROTATION_STEP % 360
+
+        def render():
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+
+            # Draw main body (octagon shape for modern look)
+            radius = size // 3
+            points = []
+            for i in range(8):
+                angle = math.pi / 4 * i
+                points.append((
+                    size//2 + math.cos(angle) * radius,
+                    size//2 + math.sin(angle) * radius
+                ))
+            pygame.draw.polygon(surface, PLAYER_COLOR, points)
+            pygame.draw.polygon(surface, outline_color, points, 2)
+
+            # Add direction indicator
+            if indicator_color:
+                indicator_length = size//4
+                pygame.draw.line(surface, indicator_color,
+                               (size//2, size//2),
+                               (size//2 + indicator_length, size//2), 2)
+
+            if rotation:
+                surface = pygame.transform.rotate(surface, -rotation)
+            return surface
+        return self.get(('player_body', size, outline_color, indicator_color, rotation), render)
+
+    def item_glow(self, cell_type, cell_size):
+        def render():
+            surface = pygame.Surface((cell_size * 2, cell_size * 2), pygame.SRCALPHA)
+            if cell_type == Cell.COIN:
+                radius = cell_size // 4
+                pygame.draw.circle(surface, (*NEON_BLUE, 50),
+                                 (cell_size, cell_size), radius * 1.5)
+            else:
+                size = cell_size // 3
+                pygame.draw.rect(surface, (*LIGHT_BLUE, 50),
+                               pygame.Rect(cell_size - size, cell_size - size,
+                                         size * 2, size * 2))
+            return surface
+        return self.get(('item_glow', cell_type, cell_size), render)
+
+# Shared by everything that draws
+sprite_cache = SpriteCache()
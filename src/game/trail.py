@@ -0,0 +1,58 @@
+import math
+from collections import deque
+from src.utils.optional_pygame import pygame
+from src.utils.constants import *
+from src.game.sprite_cache import sprite_cache
+
+class Trail:
+    """Recent positions of a moving entity in a fixed-capacity ring buffer.
+
+    The whole trail is drawn as one polyline onto a reusable alpha layer,
+    so a frame allocates nothing however many entities have trails.
+    """
+    def __init__(self, length=TRAIL_LENGTH):
+        self.points = deque(maxlen=length)
+        self.fade = 1.0
+
+    def clear(self):
+        self.points.clear()
+        self.fade = 1.0
+
+    def update(self, x, y, dt):
+        # Add the position once it has moved a little; the deque drops the oldest
+        points = self.points
+        if not points or abs(x - points[-1][0]) > 0.1 or abs(y - points[-1][1]) > 0.1:
+            points.append((x, y))
+
+        self.fade = max(0, self.fade - TRAIL_FADE_SPEED * dt)
+        if self.fade <= 0:
+            while len(points) > 2:
+                points.popleft()
+            self.fade = 1.0
+
+    def draw(self, surface, cell_size, offset, color, max_alpha):
+        points = self.points
+        if len(points) < 2:
+            return
+
+        # One colour and width for the whole line, taken at the middle of
+        # the trail, which used to fade in segment by segment
+        progress = (len(points) - 2) / (2 * len(points))
+        alpha = int(max_alpha * progress * self.fade)
+        width = max(1, int(cell_size / 8 * progress))
+        if alpha <= 0:
+            return
+
+        half = cell_size / 2
+        xs = [offset[0] + int(x * cell_size + half) for x, _ in points]
+        ys = [offset[1] + int(y * cell_size + half) for _, y in points]
+        left = min(xs) - width
+        top = min(ys) - width
+
+        # Layer sizes are rounded up to whole cells so only a few get cached
+        layer_width = math.ceil((max(xs) + width - left + 1) / cell_size) * cell_size
+        layer_height = math.ceil((max(ys) + width - top + 1) / cell_size) * cell_size
+        layer = sprite_cache.scratch(layer_width, layer_height)
+        pygame.draw.lines(layer, (*color[:3], alpha), False,
+                          [(x - left, y - top) for x, y in zip(xs, ys)], width)
+        surface.blit(layer, (left, top))
@@ -1,5 +1,10 @@
+import argparse
 from src.game.game import Game
 
 if __name__ == "__main__":
-    game = Game()
-    game.run() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Maze Runner")
+    parser.add_argument('--endless', action='store_true',
+                        help="explore one endless maze instead of levels")
+    args = parser.parse_args()
+    game = Game(endless=args.endless)
+    game.run()
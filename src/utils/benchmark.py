@@ -0,0 +1,220 @@
+"""
+Benchmarks for maze generation, enemy pathfinding, simulation updates and
+rendering across grid sizes.
+
+    python -m src.utils.benchmark --save baseline.json
+    python -m src.utils.benchmark --compare baseline.json
+
+A comparison run exits with status 1 when any case is slower than the
+baseline by more than the tolerance.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Rendering benchmarks draw offscreen
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from src.game.maze import Maze
+from src.game.enemy import Enemy
+from src.game.simulation import Simulation
+from src.utils.constants import *
+
+BENCHMARK_SIZES = [21, 101, 501, 1001]
+# Far more than any level spawns, to stress the per-enemy costs
+BENCHMARK_ENEMIES = 200
+
+def measure(run, setup=None, repeat=5):
+    # Median wall time per call in ms. Setup runs untimed before every
+    # repetition; without one, fast calls are looped to get above timer noise.
+    number = 1
+    if setup is None:
+        start = time.perf_counter()
+        run(None)
+        elapsed = time.perf_counter() - start
+        number = max(1, min(1000, int(0.005 / max(elapsed, 1e-7))))
+
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        for _ in range(number):
+            run(state)
+        timings.append((time.perf_counter() - start) * 1000 / number)
+    return statistics.median(timings)
+
+def far_cell(maze):
+    # The exit is the cell generation placed furthest from the start
+    return maze.exit_pos
+
+def bench_maze_init(size, repeat):
+    return measure(lambda _: Maze(1, size, seed=1), repeat=repeat)
+
+def bench_find_path_to_player(size, repeat):
+    maze = Maze(1, size, seed=1)
+
+    def setup():
+        # Cold call: nothing cached for this player cell yet
+        maze.player_distances = None
+        enemy = Enemy(1, rng=random.Random(1))
+        return enemy
+    return measure(lambda enemy: enemy.find_path_to_player(maze, far_cell(maze)), setup, repeat)
+
+def bench_chase_step(size, repeat):
+    # Warm per-step cost: the player walks one cell per call and the enemy
+    # takes one step after it, so searches can reuse earlier work
+    maze = Maze(1, size, seed=1)
+    route = maze.get_pathfinder().trace(maze.get_exit_distances(), (1, 1))[::-1]
+    state = {'tick': 0}
+    enemy = Enemy(1, rng=random.Random(1))
+
+    def run(_):
+        tick = state['tick'] = (state['tick'] + 1) % len(route)
+        if tick == 0:
+            enemy.x, enemy.y = maze.exit_pos
+        next_pos = enemy.find_path_to_player(maze, route[tick])
+        if next_pos:
+            enemy.x, enemy.y = next_pos[0]
+    return measure(run, repeat=repeat)
+
+def bench_find_optimal_path_to_exit(size, repeat):
+    maze = Maze(1, size, seed=1)
+
+    def setup():
+        maze.exit_distances = None
+        return Enemy(1, rng=random.Random(1))
+    return measure(lambda enemy: enemy.find_optimal_path_to_exit(maze, (1, 1)), setup, repeat)
+
+def bench_should_wait_at_intersection(size, repeat):
+    maze = Maze(1, size, seed=1)
+    enemy = Enemy(1, rng=random.Random(1))
+    maze.get_exit_route()
+    return measure(lambda _: enemy.should_wait_at_intersection(maze, far_cell(maze)), repeat=repeat)
+
+def walk_route(maze, start=0):
+    # Cells along the exit route and back, forever, from route[start + 1]
+    # and stopping short of the exit so the level never ends
+    route = maze.get_exit_route()
+    cells = route[1:-1] + route[-3::-1]
+    return itertools.cycle(cells[start:] + cells[:start])
+
+def make_simulation(size):
+    simulation = Simulation(seed=1)
+    simulation.maze = Maze(1, size, seed=1)
+    simulation.spawn_enemies()
+    simulation.countdown = 0
+    # Keep the game running however many ticks are measured
+    simulation.immunity = float('inf')
+    return simulation
+
+def walking_update(simulation):
+    # One tick with the player walking the exit route at its normal speed,
+    # so distance fields and enemy plans keep having to follow it
+    cells = walk_route(simulation.maze)
+
+    def run(_):
+        player = simulation.player
+        if not player.current_direction:
+            x, y = next(cells)
+            player.move(x - int(player.x), y - int(player.y), simulation.maze)
+        simulation.update(simulation.timestep)
+    return run
+
+def bench_update(size, repeat):
+    simulation = make_simulation(size)
+    return measure(walking_update(simulation), repeat=repeat)
+
+def bench_update_enemies(size, repeat):
+    simulation = make_simulation(size)
+    simulation.spawn_enemies(BENCHMARK_ENEMIES)
+    return measure(walking_update(simulation), repeat=repeat)
+
+def bench_draw(size, repeat):
+    import pygame
+    from src.game.game import Game
+
+    game = Game()
+    game.level_pipeline.close()
+    game.level_pipeline = None
+    game.screen = pygame.Surface(game.screen.get_size())
+    game.maze = Maze(1, size, seed=1)
+    game.spawn_enemies()
+    game.maze_surface = None
+    game.state = PLAYING
+    game.countdown = 0
+
+    # The player moves a cell per frame, so the camera scrolls and the maze
+    # layer is re-rendered whenever the view runs off it. Halfway along the
+    # route the view is usually clear of the maze's edges, where it stops.
+    cells = walk_route(game.maze, len(game.maze.get_exit_route()) // 2)
+
+    def run(_):
+        player = game.player
+        player.x, player.y = player.target_x, player.target_y = next(cells)
+        game.entity_index.move(player)
+        game.draw()
+    run(None)
+    return measure(run, repeat=repeat)
+
+BENCHMARKS = {
+    'maze_init': bench_maze_init,
+    'find_path_to_player': bench_find_path_to_player,
+    'chase_step': bench_chase_step,
+    'find_optimal_path_to_exit': bench_find_optimal_path_to_exit,
+    'should_wait_at_intersection': bench_should_wait_at_intersection,
+    'update_tick': bench_update,
+    'update_tick_many_enemies': bench_update_enemies,
+    'draw_frame': bench_draw,
+}
+
+def run_benchmarks(sizes, repeat):
+    results = {}
+    for name, bench in BENCHMARKS.items():
+        for size in sizes:
+            key = f"{name}[{size}]"
+            results[key] = bench(size, repeat)
+            print(f"{key:40s} {results[key]:10.3f} ms")
+    return results
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        limit = baseline[key] * (1 + tolerance)
+        if value > limit:
+            regressions.append(key)
+            print(f"REGRESSION {key}: {value:.3f} ms vs baseline {baseline[key]:.3f} ms")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maze Runner benchmarks")
+    parser.add_argument('--sizes', type=int, nargs='+', default=BENCHMARK_SIZES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help="write the results as a baseline JSON file")
+    parser.add_argument('--compare', help="baseline JSON file to check against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeat)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,13 +11,19 @@ UI_PADDING = 20
 UI_BG_COLOR = (0, 20, 40, 200)
 UI_TEXT_COLOR = (0, 200, 255)
 
+# Camera settings: larger mazes scroll inside a fixed-size view
+MAX_VIEWPORT_SIZE = 21  # cells shown along each axis
+VIEWPORT_SIZE = min(GRID_SIZE, MAX_VIEWPORT_SIZE)
+VIEW_LAYER_MARGIN = VIEWPORT_SIZE // 2  # cells pre-rendered around the view
+
 # Window settings
-WINDOW_WIDTH = GRID_SIZE * CELL_SIZE + 2 * PADDING
-WINDOW_HEIGHT = GRID_SIZE * CELL_SIZE + 2 * PADDING + UI_HEIGHT  # Add UI height to total window height
+WINDOW_WIDTH = VIEWPORT_SIZE * CELL_SIZE + 2 * PADDING
+WINDOW_HEIGHT = VIEWPORT_SIZE * CELL_SIZE + 2 * PADDING + UI_HEIGHT  # Add UI height to total window height
 
 # Font settings
 FONT_SIZE = 36
 SMALL_FONT_SIZE = 24
+TINY_FONT_SIZE = 18
 
 # Game states
 MENU = 'menu'
@@ -43,15 +49,50 @@ ENEMY_COLOR = (255, 100, 100)
 ENEMY_TRAIL_COLOR = (255, 100, 100, 50)
 ENEMY_GLOW = None
 ENEMY_SPEED = 0.1
+MAX_ENEMIES = 12  # most enemies a level ever gets
+OPEN_CELLS_PER_ENEMY = 40  # and at most one per this many open cells
+LEVELS_PER_EXTRA_ENEMY = 2  # one more enemy every this many levels
+ENEMY_SPAWN_DISTANCE = 10  # extra enemies start at least this far from the start
+# From this maze size up, enemies repair their own path to the player instead
+# of sharing a full distance field that is rebuilt on every player move
+INCREMENTAL_PLANNER_MIN_SIZE = 201
+PLANNER_SLACK = 16  # steps a repaired path may be off the shortest before a fresh search
+PLANNER_NODE_BUDGET = 2000  # A* nodes expanded per tick, shared by all enemies
 
 # Animation settings
 ANIMATION_SPEED = 0.2
 
+# Sprite cache settings
+SPRITE_CACHE_SIZE = 512
+ROTATION_STEP = 5  # degrees between cached player rotations
+PARTICLE_ALPHA_STEP = 16
+
+# Trail settings
+TRAIL_LENGTH = 8  # points kept per entity
+TRAIL_FADE_SPEED = 1.2  # fade lost per second
+CULL_MARGIN = 4  # cells past the view an entity's trail and glow can reach
+
+# Particle settings
+MAX_PARTICLES = 50000
+PARTICLE_MAX_SIZE = 4  # pixels; sizes are drawn in half-pixel steps up to this
+PARTICLE_SPEED = 1.5  # cells per second
+ENEMY_PARTICLES_PER_STEP = 4
+
 # Game timing
 COUNTDOWN_DURATION = 3.0
 IMMUNITY_DURATION = 1.5
 POWER_UP_DURATION = 5.0
 
+# Input actions (bit flags, one mask per simulation tick)
+ACTION_UP = 1
+ACTION_DOWN = 2
+ACTION_LEFT = 4
+ACTION_RIGHT = 8
+ACTION_PAUSE = 16
+ACTION_RESTART = 32
+ACTION_START = 64
+INPUT_QUEUE_SIZE = 2  # moves that can be typed ahead of the player
+
 # Cell types
 class Cell:
     WALL = 0
@@ -95,4 +136,30 @@ COUNTDOWN_DURATION = 3.0
 IMAGES_DIR = os.path.join(ASSETS_DIR, 'images')
 
 # FPS
-FPS = 60 
\ No newline at end of file
+FPS = 60  # display frame cap; 0 draws as fast as the machine allows
+VSYNC = False  # pace frames by the monitor's refresh instead of FPS
+
+# Simulation ticks
+TICK_RATE = 120  # fixed simulation steps per second, whatever the frame rate
+TIMESTEP = 1.0 / TICK_RATE
+MAX_FRAME_TIME = 0.25  # longest hitch caught up on, in seconds
+
+# Profiling
+PROFILE_ENV_VAR = 'MAZE_PROFILE'
+PROFILE_HISTORY = 600  # frames kept for percentiles and export
+PROFILE_OVERLAY_INTERVAL = 15  # frames between overlay refreshes
+
+# Replays
+REPLAY_PATH = os.path.join(ASSETS_DIR, 'last_session.replay')
+
+# Level pre-generation
+MAZE_CACHE_DIR = os.path.join(ASSETS_DIR, 'maze_cache')
+MAZE_CACHE_FILES = 16  # leftover files kept from earlier sessions
+PREGENERATE_LEVELS = 3
+PREGENERATE_WORKERS = 2
+
+# Endless mode
+CHUNK_SIZE = 31  # odd, so chunk borders are walls and edges touch corridors
+CHUNK_DOORS = 2  # openings across every chunk border
+CHUNK_LOAD_RADIUS = 2  # chunks kept loaded around the player
+CHUNK_CACHE_SIZE = 49
@@ -0,0 +1,6 @@
+# Only drawing needs pygame; the simulation runs without it, and modules
+# that draw import it from here so that a missing pygame is None, not an error
+try:
+    import pygame
+except ImportError:
+    pygame = None
@@ -0,0 +1,121 @@
+import csv
+import functools
+import json
+import time
+from collections import deque
+import numpy as np
+from src.utils.constants import *
+
+class NullSection:
+    # Shared stand-in used while profiling is off
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_SECTION = NullSection()
+
+class Section:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+class FrameProfiler:
+    """Opt-in per-frame timings (in ms) and counters, kept in a ring buffer.
+
+    Timings of a section that runs several times in one frame are summed.
+    While disabled, every hook returns after a single attribute check.
+    """
+    def __init__(self, history=PROFILE_HISTORY):
+        self.enabled = False
+        self.frames = deque(maxlen=history)
+        self.current = {}
+        self.frame_start = 0.0
+        self.frame_count = 0
+
+    def section(self, name):
+        if not self.enabled:
+            return NULL_SECTION
+        return Section(self, name)
+
+    def timed(self, name):
+        # Decorator form of section() for whole functions
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.add_time(name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def add_time(self, name, seconds):
+        self.current[name] = self.current.get(name, 0.0) + seconds * 1000
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.current[name] = self.current.get(name, 0) + amount
+
+    def start_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.current['frame'] = (time.perf_counter() - self.frame_start) * 1000
+        self.frames.append(self.current)
+        self.current = {}
+        self.frame_count += 1
+
+    def names(self):
+        names = set()
+        for frame in self.frames:
+            names.update(frame)
+        return sorted(names)
+
+    def percentiles(self, name, percents=(50, 99)):
+        # Frames where a section did not run count as zero
+        if not self.frames:
+            return tuple(0.0 for _ in percents)
+        values = [frame.get(name, 0) for frame in self.frames]
+        return tuple(float(value) for value in np.percentile(values, percents))
+
+    def summary(self):
+        summary = {}
+        for name in self.names():
+            p50, p99 = self.percentiles(name)
+            values = [frame.get(name, 0) for frame in self.frames]
+            summary[name] = {'p50': p50, 'p99': p99, 'mean': float(np.mean(values))}
+        return summary
+
+    def export(self, path):
+        """Write the buffered frames as CSV, or as JSON with a summary"""
+        names = self.names()
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(names)
+                for frame in self.frames:
+                    writer.writerow([frame.get(name, 0) for name in names])
+        else:
+            with open(path, 'w') as f:
+                json.dump({'summary': self.summary(), 'frames': list(self.frames)}, f, indent=2)
+
+# Shared by every instrumented module
+profiler = FrameProfiler()